@@ -7,6 +7,7 @@ Accepts CSV via multipart file upload or raw request body.
 from flask import request, jsonify
 
 from api import api_bp
+from services.search_service import invalidate_facets
 from import_engine import run_import
 
 
@@ -32,4 +33,5 @@ def api_import_csv():
         return jsonify({"error": "empty body"}), 400
 
     report = run_import(content, replace_existing=replace)
+    invalidate_facets()
     return jsonify(report.to_dict())
\ No newline at end of file
@@ -1523,9 +1523,10 @@ def upload_lib_file():
             from services.kicad_symbol_processor import KiCadSymbolProcessor
             try:
                 custom_props = json.loads(symbol_props_json)
-                for prop_name, prop_value in custom_props.items():
-                    if prop_value:  # Only set non-empty values
-                        content = KiCadSymbolProcessor._set_property(content, prop_name, prop_value)
+                # Only set non-empty values
+                content = KiCadSymbolProcessor._set_properties(
+                    content, {k: v for k, v in custom_props.items() if v}
+                )
             except json.JSONDecodeError:
                 pass
         
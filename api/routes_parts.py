@@ -2,13 +2,12 @@
 api.routes_parts - /api/v1/parts CRUD endpoints.
 """
 
-import json
 from flask import request, jsonify
 
 from api import api_bp
 from db import get_session
 from services.parts_service import PartsService
-from services.search_service import SearchService
+from services.search_service import SearchService, invalidate_facets, parse_prop_filters
 import config
 
 
@@ -39,12 +38,9 @@ def list_parts():
         sort_order = "asc"
 
     # Parse property filters from JSON
-    props = {}
-    if props_str:
-        try:
-            props = json.loads(props_str)
-        except json.JSONDecodeError:
-            props = {}
+    if len(props_str) > config.PROPS_MAX_LENGTH:
+        return jsonify({"error": "props too long"}), 400
+    props = parse_prop_filters(props_str)
 
     session = get_session()
     try:
@@ -88,6 +84,7 @@ def create_part():
     try:
         part = PartsService.create(session, data)
         session.commit()
+        invalidate_facets()
         return jsonify(part.to_dict()), 201
     except Exception as exc:
         session.rollback()
@@ -107,6 +104,7 @@ def update_part(dmtuid: str):
             return jsonify({"error": "not found"}), 404
         PartsService.update(session, part, data)
         session.commit()
+        invalidate_facets()
         session.refresh(part)
         return jsonify(part.to_dict())
     except Exception as exc:
@@ -126,6 +124,7 @@ def delete_part(dmtuid: str):
             return jsonify({"error": "not found"}), 404
         PartsService.delete(session, part)
         session.commit()
+        invalidate_facets()
         return jsonify({"deleted": dmtuid.upper()})
     except Exception as exc:
         session.rollback()
@@ -5,17 +5,35 @@ Expose the classification schema so external tools (KiCad plugins,
 CLI scripts) can enumerate valid codes without parsing the JSON themselves.
 """
 
-from flask import jsonify
+import hashlib
+from functools import lru_cache
+
+from flask import Response, jsonify, request
 
 from api import api_bp
 from schema.loader import get_domains, get_cc_ss_guidelines, get_cross_cutting
 from schema.templates import get_fields
 
 
+@lru_cache(maxsize=1)
+def _domains_payload() -> tuple[bytes, str]:
+    """
+    Serialized domain list and its ETag.
+
+    The schema is loaded once at startup, so the encoded tree is built
+    on the first request and reused.
+    """
+    body = jsonify(get_domains()).get_data()
+    return body, hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
 @api_bp.route("/schema/domains")
 def schema_domains():
     """List all domains and their families."""
-    return jsonify(get_domains())
+    body, etag = _domains_payload()
+    resp = Response(body, mimetype="application/json")
+    resp.set_etag(etag)
+    return resp.make_conditional(request)
 
 
 @api_bp.route("/schema/template/<ttff>")
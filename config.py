@@ -34,6 +34,11 @@ PORT   = int(os.environ.get("DMTDB_PORT", "5000"))
 DEBUG  = os.environ.get("DMTDB_DEBUG", "0") == "1"
 SECRET = os.environ.get("DMTDB_SECRET", "dmtdb-dev-key-change-in-prod")
 
+# Internal nginx location that maps to DATASHEETS_DIR.  When set, datasheets
+# are handed to nginx via X-Accel-Redirect instead of being streamed through
+# Python.  Empty (default) serves them directly.
+DATASHEETS_ACCEL_PREFIX = os.environ.get("DMTDB_DATASHEETS_ACCEL", "").rstrip("/")
+
 # ── Pagination ─────────────────────────────────────────────────────────
 DEFAULT_PAGE_SIZE = 50
 API_MAX_LIMIT     = 1000
@@ -41,6 +46,10 @@ API_DEFAULT_LIMIT = 100
 SEARCH_DROPDOWN_LIMIT = 20
 KICAD_SEARCH_LIMIT    = 200
 
+# Longest accepted props (property filter JSON) query parameter; real
+# filter selections are a few hundred bytes
+PROPS_MAX_LENGTH = 4096
+
 # ── Supply Chain ───────────────────────────────────────────────────────
 # How many seconds before cached pricing is considered stale (default 24h)
 SUPPLY_CHAIN_CACHE_TTL = int(os.environ.get("DMTDB_SUPPLY_CACHE_TTL", "86400"))
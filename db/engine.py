@@ -7,20 +7,51 @@ by changing config.DB_URL; no other code needs to change.
 
 from __future__ import annotations
 
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine, event, inspect, make_url, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session, sessionmaker
 
 from db.models import Base
 
 _engine = None
 _SessionLocal: sessionmaker | None = None
+_text_index = False
+
+# Columns covered by SearchService's free-text filter
+TEXT_SEARCH_COLUMNS = ("dmtuid", "mpn", "value", "description", "manufacturer", "location")
+
+# (name, SQL type) of parts columns added after the first release
+_ADDED_PART_COLUMNS = (
+    ("value_numeric", "FLOAT"),
+    ("search_blob", "TEXT"),
+)
+
+# Connection pool for file/server databases.  LIFO hands out the most
+# recently returned connection, so bursts of short requests (label
+# previews, form saves) reuse a few warm connections instead of cycling
+# through the whole pool.
+_POOL_OPTIONS = {
+    "pool_size": 10,
+    "max_overflow": 20,
+    "pool_timeout": 30,
+    "pool_use_lifo": True,
+}
+# Extra options for server databases (Postgres): drop connections the
+# server may have closed, and check them before use
+_SERVER_POOL_OPTIONS = {
+    "pool_recycle": 1800,
+    "pool_pre_ping": True,
+}
+
+# Indexes replaced by wider ones in later releases
+_DROPPED_INDEXES = ("ix_field_lookup",)   # superseded by ix_field_cover
 
 
 def init_db(db_url: str) -> None:
     """Create the engine, apply SQLite pragmas, and emit CREATE TABLE."""
-    global _engine, _SessionLocal
+    global _engine, _SessionLocal, _text_index
 
-    _engine = create_engine(db_url, echo=False, future=True)
+    _engine = create_engine(db_url, echo=False, future=True, **_pool_options(db_url))
 
     if "sqlite" in db_url:
         @event.listens_for(_engine, "connect")
@@ -32,9 +63,136 @@ def init_db(db_url: str) -> None:
             cur.close()
 
     Base.metadata.create_all(_engine)
+    _upgrade_schema(_engine)
+    _text_index = "sqlite" in db_url and _init_sqlite_text_index(_engine)
     _SessionLocal = sessionmaker(bind=_engine, expire_on_commit=False)
 
 
+def _pool_options(db_url: str) -> dict:
+    """
+    create_engine() pool keyword arguments for db_url.
+
+    In-memory SQLite uses a single-connection pool that does not take
+    sizing options, so it gets none.
+    """
+    url = make_url(db_url)
+    if url.get_backend_name() != "sqlite":
+        return {**_POOL_OPTIONS, **_SERVER_POOL_OPTIONS}
+    if url.database in (None, "", ":memory:"):
+        return {}
+    return dict(_POOL_OPTIONS)
+
+
+def _upgrade_schema(engine) -> None:
+    """
+    Bring a database created by an earlier version up to date.
+
+    create_all() only creates missing tables, so new parts columns are
+    added here (with the derived search columns backfilled), indexes
+    added to existing tables are created and superseded ones dropped.
+    """
+    columns = {c["name"] for c in inspect(engine).get_columns("parts")}
+    missing = [c for c in _ADDED_PART_COLUMNS if c[0] not in columns]
+    if missing:
+        from services.search_service import search_blob, value_sort_number
+
+        with engine.begin() as conn:
+            for name, ddl_type in missing:
+                conn.execute(text(f"ALTER TABLE parts ADD COLUMN {name} {ddl_type}"))
+            rows = conn.execute(text(
+                f"SELECT {', '.join(TEXT_SEARCH_COLUMNS)} FROM parts"
+            )).all()
+            params = [
+                {
+                    "dmtuid": row.dmtuid,
+                    "num": value_sort_number(row.value),
+                    "blob": search_blob(*row),
+                }
+                for row in rows
+            ]
+            if params:
+                conn.execute(
+                    text("UPDATE parts SET value_numeric = :num, search_blob = :blob "
+                         "WHERE dmtuid = :dmtuid"),
+                    params,
+                )
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+    with engine.begin() as conn:
+        for name in _DROPPED_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+
+# The index table and its sync triggers; missing any of them forces a rebuild
+_TEXT_INDEX_OBJECTS = ("parts_fts", "parts_fts_ai", "parts_fts_ad", "parts_fts_au")
+_TEXT_INDEX_PRESENT = text(
+    "SELECT count(*) FROM sqlite_master WHERE name IN (%s)"
+    % ", ".join(f"'{name}'" for name in _TEXT_INDEX_OBJECTS)
+)
+
+# True if parts_fts does not index exactly the current parts rowids.  Only
+# compares rowids against the index's docsize table, no re-tokenizing.
+_TEXT_INDEX_STALE = text(
+    "SELECT (SELECT count(*) FROM parts) != (SELECT count(*) FROM parts_fts_docsize) "
+    "OR EXISTS (SELECT 1 FROM parts WHERE rowid NOT IN (SELECT id FROM parts_fts_docsize))"
+)
+
+
+def _init_sqlite_text_index(engine) -> bool:
+    """
+    Maintain an FTS5 trigram index over the free-text search columns.
+
+    The trigram tokenizer answers case-insensitive substring queries from
+    the index, which a leading-wildcard ILIKE cannot.  The index is an
+    external-content table over parts (keyed by rowid) kept in sync with
+    triggers.  It is rebuilt on startup only when the table or a trigger
+    was missing, or when its rowids no longer match parts (VACUUM may
+    renumber the rowids of a table without an INTEGER PRIMARY KEY).
+
+    Returns False if this SQLite build lacks FTS5 or the trigram
+    tokenizer (< 3.34); search then keeps using ILIKE.
+    """
+    cols = ", ".join(TEXT_SEARCH_COLUMNS)
+    new_vals = ", ".join(f"new.{c}" for c in TEXT_SEARCH_COLUMNS)
+    old_vals = ", ".join(f"old.{c}" for c in TEXT_SEARCH_COLUMNS)
+    delete_old = (
+        f"INSERT INTO parts_fts(parts_fts, rowid, {cols}) "
+        f"VALUES ('delete', old.rowid, {old_vals});"
+    )
+    insert_new = f"INSERT INTO parts_fts(rowid, {cols}) VALUES (new.rowid, {new_vals});"
+    try:
+        with engine.begin() as conn:
+            present = conn.execute(_TEXT_INDEX_PRESENT).scalar()
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS parts_fts USING fts5("
+                f"{cols}, content='parts', content_rowid='rowid', tokenize='trigram')"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS parts_fts_ai AFTER INSERT ON parts "
+                f"BEGIN {insert_new} END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS parts_fts_ad AFTER DELETE ON parts "
+                f"BEGIN {delete_old} END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS parts_fts_au AFTER UPDATE OF {cols} ON parts "
+                f"BEGIN {delete_old} {insert_new} END"
+            ))
+            if present < len(_TEXT_INDEX_OBJECTS) or conn.execute(_TEXT_INDEX_STALE).scalar():
+                conn.execute(text("INSERT INTO parts_fts(parts_fts) VALUES ('rebuild')"))
+    except OperationalError:
+        return False
+    return True
+
+
+def has_text_index() -> bool:
+    """True if the SQLite FTS5 trigram index for text search is available."""
+    return _text_index
+
+
 def get_session() -> Session:
     """Return a new session.  Caller is responsible for .close()."""
     if _SessionLocal is None:
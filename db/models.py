@@ -16,7 +16,7 @@ import json
 from datetime import datetime, timezone
 
 from sqlalchemy import (
-    Boolean, Column, String, Integer, DateTime, Text, ForeignKey, Index,
+    Boolean, Column, String, Integer, Float, DateTime, Text, ForeignKey, Index,
 )
 from sqlalchemy.orm import DeclarativeBase, relationship
 
@@ -42,6 +42,8 @@ class Part(Base):
     mpn          = Column(String(200), index=True, default="")
     manufacturer = Column(String(200), index=True, default="")
     value        = Column(String(200), index=True, default="")
+    value_numeric = Column(Float, index=True)                   # sort key for value, see search_service
+    search_blob   = Column(Text, default="")                     # lowered text search columns, see search_service
     description  = Column(Text, default="")
     quantity     = Column(String(50), default="")
     location     = Column(String(200), default="")
@@ -87,6 +89,10 @@ class Part(Base):
 
     __table_args__ = (
         Index("ix_ttffccss", "tt", "ff", "cc", "ss"),
+        # Covering indexes for the category facets in ui.live_search
+        Index("ix_facet_value", "tt", "ff", "cc", "ss", "value"),
+        Index("ix_facet_manufacturer", "tt", "ff", "cc", "ss", "manufacturer"),
+        Index("ix_facet_location", "tt", "ff", "cc", "ss", "location"),
     )
 
     # ── Serialisation ──────────────────────────────────────────────────
@@ -132,7 +138,11 @@ class PartField(Base):
     part = relationship("Part", back_populates="fields")
 
     __table_args__ = (
-        Index("ix_field_lookup", "dmtuid", "field_name"),
+        # Covers EAV facets and per-part field lookups without table reads
+        Index("ix_field_cover", "dmtuid", "field_name", "field_value"),
+        # Property filters look up parts by field value
+        Index("ix_field_name_value", "field_name", "field_value",
+              postgresql_include=["dmtuid"]),
     )
 
 
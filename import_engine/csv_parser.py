@@ -11,20 +11,33 @@ from __future__ import annotations
 
 import csv
 import io
-from typing import Optional
+from typing import BinaryIO, Optional
 
 
-def prepare_reader(raw: str | bytes) -> Optional[csv.DictReader]:
+def prepare_reader(raw: str | bytes | BinaryIO) -> Optional[csv.DictReader]:
     """
-    Accept raw file content (bytes or str), clean it,
-    and return a DictReader.  Returns None if content is empty.
-    """
-    text = _decode(raw)
-    if not text or not text.strip():
-        return None
+    Accept raw file content (bytes or str) or a binary file object, clean
+    it, and return a DictReader.  Returns None if content is empty.
 
-    reader = csv.DictReader(io.StringIO(text))
-    if reader.fieldnames is None:
+    File objects are decoded and parsed lazily, row by row, so an upload
+    is never held in memory as a whole.
+    """
+    source = None
+    if not isinstance(raw, (str, bytes)):
+        try:
+            # utf-8-sig drops a leading BOM, like _decode()
+            source = io.TextIOWrapper(raw, encoding="utf-8-sig", errors="replace", newline="")
+        except AttributeError:
+            # Not a full io object (e.g. SpooledTemporaryFile before 3.11)
+            raw = raw.read()
+    if source is None:
+        text = _decode(raw)
+        if not text or not text.strip():
+            return None
+        source = io.StringIO(text)
+
+    reader = csv.DictReader(source)
+    if not reader.fieldnames or not any(h.strip() for h in reader.fieldnames):
         return None
 
     # Strip whitespace from every header
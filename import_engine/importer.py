@@ -7,23 +7,30 @@ a structured ImportReport.
 
 from __future__ import annotations
 
+from itertools import islice
+from typing import BinaryIO
+
 from db.engine import get_session
 from import_engine.csv_parser import prepare_reader
 from import_engine.row_processor import RowProcessor, RowError
 from import_engine.report import ImportReport
 
+# Rows accumulated before each flush (also the duplicate-check chunk size)
+FLUSH_BATCH_SIZE = 500
+
 
 def run_import(
-    file_content: str | bytes,
+    file_content: str | bytes | BinaryIO,
     *,
     replace_existing: bool = False,
 ) -> ImportReport:
     """
-    Import a CSV blob into the database.
+    Import a CSV blob or binary file object into the database.
 
     Parameters
     ----------
-    file_content : raw CSV (bytes or str)
+    file_content : raw CSV (bytes or str), or a binary file object that
+                   is read row by row
     replace_existing : if True, overwrite rows with duplicate DMTUIDs
 
     Returns
@@ -38,19 +45,33 @@ def run_import(
 
     session = get_session()
     processor = RowProcessor()
+    unflushed = 0
 
     try:
-        for row_idx, row in enumerate(reader, start=2):   # row 1 = header
-            report.total_rows += 1
-            try:
-                part = processor.process(session, row, replace_existing)
-                session.add(part)
-                session.flush()
-                report.imported += 1
-            except RowError as exc:
-                report.add_error(row_idx, str(exc))
-            except Exception as exc:
-                report.add_error(row_idx, f"Unexpected: {exc}")
+        # Parts are flushed in batches so SQLAlchemy can emit multi-row
+        # INSERTs; autoflush would otherwise flush before every lookup
+        with session.no_autoflush:
+            rows = enumerate(reader, start=2)   # row 1 = header
+            # Rows are read in chunks so the duplicate check for a whole
+            # chunk is one query (see RowProcessor.prefetch)
+            while chunk := list(islice(rows, FLUSH_BATCH_SIZE)):
+                processor.prefetch(session, [row for _, row in chunk])
+                for row_idx, row in chunk:
+                    report.total_rows += 1
+                    try:
+                        part = processor.process(session, row, replace_existing)
+                        session.add(part)
+                        report.imported += 1
+                        unflushed += 1
+                    except RowError as exc:
+                        report.add_error(row_idx, str(exc))
+                    except Exception as exc:
+                        report.add_error(row_idx, f"Unexpected: {exc}")
+
+                    if unflushed >= FLUSH_BATCH_SIZE:
+                        session.flush()
+                        processor.flushed()
+                        unflushed = 0
 
         session.commit()
     except Exception as exc:
@@ -8,7 +8,9 @@ a Part object ready to be added, or raise RowError.
 from __future__ import annotations
 
 import json
-from sqlalchemy import func
+from functools import lru_cache
+
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from db.models import Part, PartField
@@ -16,6 +18,16 @@ from schema.numbering import build_dmtuid, parse_dmtuid, validate_segments
 from schema.loader import valid_tt
 from schema.templates import get_fields
 from import_engine.field_map import DIRECT_FIELDS, SKIP_FOR_EAV
+from services.search_service import update_search_columns
+
+
+@lru_cache(maxsize=256)
+def _eav_columns(tt: str, ff: str) -> tuple[str, ...] | None:
+    """Template columns stored as EAV for TT+FF, or None if there is no template."""
+    template = get_fields(tt, ff)
+    if not template:
+        return None
+    return tuple(dict.fromkeys(col for col in template if col not in SKIP_FOR_EAV))
 
 
 class RowError(Exception):
@@ -31,6 +43,32 @@ class RowProcessor:
 
     def __init__(self):
         self._xxx_cache: dict[str, int] = {}   # "TTFFCCSS" → last assigned int
+        self._unflushed: dict[str, Part] = {}  # DMTUID → Part added but not yet flushed
+        self._absent: set[str] = set()         # DMTUIDs known not to be in the DB
+
+    def prefetch(self, session: Session, rows: list[dict]) -> None:
+        """
+        Check which explicit DMTUIDs of the upcoming rows already exist,
+        in one IN query, so process() can skip the per-row lookup for the
+        (usual) new ones.  Existing parts are still loaded by process().
+        """
+        uids = set()
+        for row in rows:
+            dmtuid_raw = (row.get("DMTUID") or "").strip()
+            if dmtuid_raw and parse_dmtuid(dmtuid_raw):
+                uids.add(dmtuid_raw.upper())
+        if not uids:
+            self._absent = set()
+            return
+        existing = session.scalars(select(Part.dmtuid).where(Part.dmtuid.in_(uids)))
+        self._absent = uids.difference(existing)
+
+    def flushed(self) -> None:
+        """Tell the processor that all parts it returned have been flushed."""
+        # Flushed parts are in the DB now; a later repeat of one of them in
+        # the current chunk must go through session.get() again
+        self._absent.difference_update(self._unflushed)
+        self._unflushed.clear()
 
     def process(
         self,
@@ -41,16 +79,28 @@ class RowProcessor:
         """
         Validate one row, resolve its DMTUID, build a Part.
         Raises RowError on any problem.
+
+        The caller adds the returned Part to the session and may flush in
+        batches; call flushed() after each flush.
         """
         tt, ff, cc, ss, xxx, dmtuid = self._resolve_uid(session, row)
 
-        # Duplicate check
-        existing = session.get(Part, dmtuid)
-        if existing and not replace:
+        # Duplicate check (including earlier rows of this run not yet flushed).
+        # A prefetched absent DMTUID only skips the lookup once; a repeat
+        # of it in the CSV refers to the part created here.
+        if dmtuid in self._absent:
+            self._absent.discard(dmtuid)
+            existing = None
+        else:
+            existing = session.get(Part, dmtuid)
+        pending = None if existing else self._unflushed.get(dmtuid)
+        if (existing or pending) and not replace:
             raise RowError(f"Duplicate DMTUID {dmtuid} (enable replace to overwrite)")
         if existing:
             session.delete(existing)
             session.flush()
+        elif pending:
+            session.expunge(pending)
 
         part = Part(dmtuid=dmtuid, tt=tt, ff=ff, cc=cc, ss=ss, xxx=xxx)
 
@@ -59,10 +109,12 @@ class RowProcessor:
             val = (row.get(csv_col) or "").strip()
             if val:
                 setattr(part, attr, val)
+        update_search_columns(part)
 
         # Template-driven EAV fields
         self._apply_template_fields(part, row)
 
+        self._unflushed[dmtuid] = part
         return part
 
     # ── Private helpers ────────────────────────────────────────────────
@@ -108,7 +160,13 @@ class RowProcessor:
                 Part.tt == tt, Part.ff == ff,
                 Part.cc == cc, Part.ss == ss,
             ).scalar()
-            self._xxx_cache[group] = (int(db_max) if db_max else 0) + 1
+            # Explicit DMTUIDs of this group that are not flushed yet
+            pending_max = max(
+                (int(p.xxx) for p in self._unflushed.values()
+                 if (p.tt, p.ff, p.cc, p.ss) == (tt, ff, cc, ss)),
+                default=0,
+            )
+            self._xxx_cache[group] = max(int(db_max) if db_max else 0, pending_max) + 1
 
         val = self._xxx_cache[group]
         if val > 999:
@@ -118,10 +176,9 @@ class RowProcessor:
     @staticmethod
     def _apply_template_fields(part: Part, row: dict):
         """Add EAV fields allowed by the template, or dump to extra_json."""
-        template = get_fields(part.tt, part.ff)
+        allowed = _eav_columns(part.tt, part.ff)
 
-        if template:
-            allowed = set(template) - SKIP_FOR_EAV
+        if allowed is not None:
             for col in allowed:
                 val = (row.get(col) or "").strip()
                 if val:
@@ -102,7 +102,7 @@ def _seed_if_empty():
     from import_engine import run_import
 
     with open(config.CSV_SEED_PATH, "rb") as fh:
-        report = run_import(fh.read())
+        report = run_import(fh)
 
     print(f"  Done: {report.imported} imported, "
           f"{report.skipped} skipped / {report.total_rows} rows")
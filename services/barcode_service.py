@@ -4,6 +4,8 @@ services.barcode_service - Code 128 barcode generation for labels.
 Generates SVG barcode elements for DMTUIDs.
 """
 
+from functools import lru_cache
+
 # Code 128 encoding tables
 CODE128_START_B = 104
 CODE128_STOP = 106
@@ -70,6 +72,30 @@ def _encode_code128(text: str) -> str:
     return pattern
 
 
+@lru_cache(maxsize=1024)
+def _bar_runs(text: str) -> tuple[int, tuple[tuple[int, int], ...]]:
+    """
+    Encoded bars for text as (pattern_length, ((start, end), ...)) in modules.
+
+    Only depends on the text, so every label size for a DMTUID shares one
+    encoding; the SVG wrappers just scale it.
+    """
+    pattern = _encode_code128(text)
+    runs = []
+    bar_start = None
+    for i, bit in enumerate(pattern):
+        if bit == '1':
+            if bar_start is None:
+                bar_start = i
+        elif bar_start is not None:
+            runs.append((bar_start, i))
+            bar_start = None
+    # Handle final bar if pattern ends with 1
+    if bar_start is not None:
+        runs.append((bar_start, len(pattern)))
+    return len(pattern), tuple(runs)
+
+
 def generate_barcode_svg(text: str, width: float = 150, height: float = 50, 
                          bar_width: float = 1.0) -> str:
     """
@@ -84,41 +110,30 @@ def generate_barcode_svg(text: str, width: float = 150, height: float = 50,
     Returns:
         SVG <g> element string containing the barcode
     """
-    pattern = _encode_code128(text)
+    pattern_len, runs = _bar_runs(text)
     
     # Calculate actual width and scale factor
-    pattern_width = len(pattern) * bar_width
+    pattern_width = pattern_len * bar_width
     scale = width / pattern_width if pattern_width > 0 else 1
     
-    bars = []
-    x = 0
-    in_bar = False
-    bar_start = 0
-    
-    for i, bit in enumerate(pattern):
-        if bit == '1' and not in_bar:
-            in_bar = True
-            bar_start = i
-        elif bit == '0' and in_bar:
-            in_bar = False
-            bar_x = bar_start * bar_width * scale
-            bar_w = (i - bar_start) * bar_width * scale
-            bars.append(f'<rect x="{bar_x:.2f}" y="0" width="{bar_w:.2f}" height="{height}" fill="black"/>')
-    
-    # Handle final bar if pattern ends with 1
-    if in_bar:
-        bar_x = bar_start * bar_width * scale
-        bar_w = (len(pattern) - bar_start) * bar_width * scale
-        bars.append(f'<rect x="{bar_x:.2f}" y="0" width="{bar_w:.2f}" height="{height}" fill="black"/>')
+    bars = [
+        f'<rect x="{start * bar_width * scale:.2f}" y="0" '
+        f'width="{(end - start) * bar_width * scale:.2f}" height="{height}" fill="black"/>'
+        for start, end in runs
+    ]
     
     return f'<g>{"".join(bars)}</g>'
 
 
+@lru_cache(maxsize=1024)
 def generate_barcode_svg_centered(text: str, center_x: float, y: float,
                                    width: float = 150, height: float = 50) -> str:
     """
     Generate SVG barcode centered at a given x position.
     
+    Cached per text and geometry, so previewing, downloading and printing
+    the same label build the barcode markup once.
+    
     Args:
         text: Text to encode
         center_x: X coordinate for center of barcode
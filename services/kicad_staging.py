@@ -6,6 +6,7 @@ On form submission, staged files are processed and saved to the final location.
 """
 
 import os
+import re
 import json
 import uuid
 import shutil
@@ -21,6 +22,12 @@ STAGING_DIR = config.BASE_DIR / "_staging"
 # Auto-cleanup: remove staged files older than this
 STAGING_MAX_AGE = timedelta(hours=2)
 
+# Symbol library / symbol name sanitization
+_NON_ALNUM_RE = re.compile(r'[^a-zA-Z0-9]')
+
+# Session IDs are issued by create_session() as str(uuid4())
+_SESSION_ID_RE = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
 
 def _ensure_staging_dir():
     """Ensure staging directory exists."""
@@ -121,6 +128,23 @@ def stage_file(session_id: str, file_type: str, filename: str, content: bytes,
     }
 
 
+def has_staged_files(session_id: str) -> bool:
+    """
+    Check whether a session has at least one staged file.
+
+    Cheap guard for form submits: values that are not session IDs never
+    touch the filesystem, and a session without uploads is detected from
+    its directory listing without reading _metadata.json.
+    """
+    if not session_id or not _SESSION_ID_RE.fullmatch(session_id):
+        return False
+    try:
+        with os.scandir(_get_session_dir(session_id)) as entries:
+            return any(entry.name != "_metadata.json" for entry in entries)
+    except OSError:
+        return False
+
+
 def get_staged_files(session_id: str) -> dict:
     """Get metadata about all staged files for a session."""
     session_dir = _get_session_dir(session_id)
@@ -207,7 +231,6 @@ def process_staged_files(session_id: str, dmtuid: str = None, tt: str = None, ff
     """
     from services.kicad_symbol_processor import KiCadSymbolProcessor
     from schema.loader import domain_name, family_name
-    import re
     
     # Use paths from config (reads from env vars DMTDB_SYM, DMTDB_FOOTPRINT, DMTDB_3D)
     SYMBOLS_DIR = config.KICAD_SYMBOLS_DIR
@@ -229,13 +252,12 @@ def process_staged_files(session_id: str, dmtuid: str = None, tt: str = None, ff
             symbol_props = symbol_info.get("metadata", {}).get("symbol_props", {})
             
             # Apply symbol properties
-            for prop_name, prop_value in symbol_props.items():
-                content = KiCadSymbolProcessor._set_property(content, prop_name, prop_value)
+            content = KiCadSymbolProcessor._set_properties(content, symbol_props)
             
             # Determine library filename
             if tt and ff:
-                dom_name = re.sub(r'[^a-zA-Z0-9]', '', domain_name(tt))
-                fam_name = re.sub(r'[^a-zA-Z0-9]', '', family_name(tt, ff))
+                dom_name = _NON_ALNUM_RE.sub('', domain_name(tt))
+                fam_name = _NON_ALNUM_RE.sub('', family_name(tt, ff))
                 lib_filename = f"DMTDB_{dom_name}_{fam_name}.kicad_sym"
             else:
                 lib_filename = "DMTDB.kicad_sym"
@@ -243,7 +265,7 @@ def process_staged_files(session_id: str, dmtuid: str = None, tt: str = None, ff
             # Generate symbol name
             value_name = symbol_props.get("Value", "") or value or ""
             mpn_val = symbol_props.get("MPN", "") or mpn or ""
-            mpn_sanitized = re.sub(r'[<>:"/\\|?*]', '_', mpn_val)
+            mpn_sanitized = KiCadSymbolProcessor.sanitize_mpn(mpn_val)
             
             if tt == "01" and ff in ("01", "02", "03") and value_name and mpn_sanitized:
                 symbol_name = f"{value_name} {mpn_sanitized}"
@@ -7,15 +7,271 @@ Manages consolidated DMTDB.kicad_sym library.
 
 from __future__ import annotations
 
+import json
+import mmap
+import os
 import re
+import threading
 from pathlib import Path
 from typing import Optional
 
-from kiutils.symbol import SymbolLib, Symbol
-
 from db.models import Part
 
 
+# ── Pre-compiled patterns ─────────────────────────────────────────────
+# Matches the name of every (property "Name" ...) in a symbol file
+_ALL_PROPS_RE = re.compile(r'\(property\s+"([^"]+)"')
+# (property "Name" "value" -> group(1) = prefix up to the value, group(2) = name
+_PROP_VALUE_RE = re.compile(r'(\(property\s+"([^"]+)"\s+)"[^"]*"')
+_SYMBOL_NAME_RE = re.compile(r'\(symbol\s+"([^"]+)"')
+_SYMBOL_DECL_RE = re.compile(r'(\(symbol\s+)"[^"]*"')
+# Top-level symbols only (one tab or two spaces); nested units are deeper
+_TOP_SYMBOL_RE = re.compile(r'^(?:\t|  )\(symbol\s+"([^"]+)"', re.MULTILINE)
+# Nested unit declarations: (symbol "Parent_0_1" -> (prefix, parent, unit)
+_SYMBOL_UNIT_RE = re.compile(r'(\(symbol\s+)"([^"]*)_(\d+_\d+)"')
+_MPN_RE = re.compile(r'\(property\s+"MPN"\s+"([^"]+)"')
+# Characters not allowed in symbol names derived from an MPN; most MPNs
+# contain none of them, so sanitize_mpn() checks before translating
+_MPN_FORBIDDEN = '<>:"/\\|?*'
+_MPN_SANITIZE_TABLE = str.maketrans(dict.fromkeys(_MPN_FORBIDDEN, '_'))
+_EOL_RE = re.compile(r'\r\n?')
+# Standard SMD chip sizes; no \b since footprints read like R_0402_1005Metric
+_FP_SIZE_RE = re.compile(r'0201|0402|0603|0805|1206|1210|2010|2512')
+_FP_ELEC_RE = re.compile(r'CP_Elec_(\d+\.?\d*x\d+\.?\d*)')
+
+# Polarized capacitor detection: CC codes and dielectric/description keywords
+_POLARIZED_CC = frozenset({'02', '03', '04', '06'})
+_POLARIZED_RE = re.compile(r'ALUMINUM|TANTALUM|POLYMER|ELECTROLYTIC|POLARIZED|ELCO')
+
+# Bytes read from the end of a library when splicing in a new symbol
+_APPEND_TAIL_BYTES = 4096
+
+# One lock per library file.  The symbol worker, staging and library
+# uploads all read-modify-write the same .kicad_sym files, either splicing
+# the tail in place or rewriting the whole file, and must not interleave.
+_library_locks: dict[str, threading.Lock] = {}
+_library_locks_guard = threading.Lock()
+
+
+def _library_lock(library_path: Path) -> threading.Lock:
+    """The write lock for a library file (keyed by absolute path)."""
+    key = os.path.abspath(library_path)
+    with _library_locks_guard:
+        lock = _library_locks.get(key)
+        if lock is None:
+            lock = _library_locks[key] = threading.Lock()
+        return lock
+
+
+# ── Passive symbol templates (str.format placeholders) ────────────────
+# Static _0_1 unit bodies; the (symbol "..._0_1" header lives in the main template
+_CAPACITOR_SHAPE = '''			(polyline
+				(pts
+					(xy -2.032 -0.762)
+					(xy 2.032 -0.762)
+				)
+				(stroke
+					(width 0.508)
+					(type default)
+				)
+				(fill
+					(type none)
+				)
+			)
+			(polyline
+				(pts
+					(xy -2.032 0.762)
+					(xy 2.032 0.762)
+				)
+				(stroke
+					(width 0.508)
+					(type default)
+				)
+				(fill
+					(type none)
+				)
+			)
+		)'''
+
+_RESISTOR_SHAPE = '''			(rectangle
+				(start -1.016 2.54)
+				(end 1.016 -2.54)
+				(stroke
+					(width 0.254)
+					(type default)
+				)
+				(fill
+					(type none)
+				)
+			)
+		)'''
+
+_DIST_PROPERTY_TEMPLATE = '''(property "DIST{index}" "{value}"
+			(at 2.286 {y_offset} 0)
+			(show_name)
+			(effects
+				(font
+					(size 1.27 1.27)
+				)
+				(justify left)
+				(hide yes)
+			)
+		)
+		'''
+
+_PASSIVE_SYMBOL_TEMPLATE = '''	(symbol "{symbol_name}"
+		(exclude_from_sim no)
+		(in_bom yes)
+		(on_board yes)
+		(property "Reference" "{ref_des}"
+			(at 2.032 2.032 0)
+			(effects
+				(font
+					(size 1.27 1.27)
+				)
+				(justify left)
+			)
+		)
+		(property "Value" "{value}"
+			(at 2.032 0 0)
+			(effects
+				(font
+					(size 1.27 1.27)
+				)
+				(justify left)
+			)
+		)
+		(property "Footprint" "{footprint}"
+			(at 2.032 -4.064 0)
+			(show_name)
+			(effects
+				(font
+					(size 1.27 1.27)
+				)
+				(justify left)
+				(hide yes)
+			)
+		)
+		(property "Datasheet" "{datasheet}"
+			(at 2.032 -14.986 0)
+			(show_name)
+			(effects
+				(font
+					(size 1.27 1.27)
+				)
+				(justify left)
+				(hide yes)
+			)
+		)
+		(property "Description" "{description}"
+			(at 2.032 -8.382 0)
+			(show_name)
+			(effects
+				(font
+					(size 1.27 1.27)
+				)
+				(justify left)
+				(hide yes)
+			)
+		)
+		(property "LCSC_PART" ""
+			(at 2.032 -12.954 0)
+			(show_name)
+			(effects
+				(font
+					(size 1.27 1.27)
+				)
+				(justify left)
+				(hide yes)
+			)
+		)
+		(property "ROHS" "YES"
+			(at 2.032 -6.35 0)
+			(show_name)
+			(effects
+				(font
+					(size 1.27 1.27)
+				)
+				(justify left)
+				(hide yes)
+			)
+		)
+		(property "FOOTPRINT_SHORT" "{fp_short}"
+			(at 2.032 -2.032 0)
+			(effects
+				(font
+					(size 1.27 1.27)
+				)
+				(justify left)
+			)
+		)
+		(property "MFR" "{manufacturer}"
+			(at 2.032 -10.668 0)
+			(show_name)
+			(effects
+				(font
+					(size 1.27 1.27)
+				)
+				(justify left)
+				(hide yes)
+			)
+		)
+		(property "MPN" "{mpn}"
+			(at 2.032 -17.018 0)
+			(show_name)
+			(effects
+				(font
+					(size 1.27 1.27)
+				)
+				(justify left)
+				(hide yes)
+			)
+		)
+		{dist_properties}
+		(symbol "{symbol_name}_0_1"
+{symbol_shape}
+		(symbol "{symbol_name}_1_1"
+			(pin passive line
+				(at 0 {pin_top} 270)
+				(length {pin_length})
+				(name "~"
+					(effects
+						(font
+							(size 1.27 1.27)
+						)
+					)
+				)
+				(number "1"
+					(effects
+						(font
+							(size 1.27 1.27)
+						)
+					)
+				)
+			)
+			(pin passive line
+				(at 0 {pin_bottom} 90)
+				(length {pin_length})
+				(name "~"
+					(effects
+						(font
+							(size 1.27 1.27)
+						)
+					)
+				)
+				(number "2"
+					(effects
+						(font
+							(size 1.27 1.27)
+						)
+					)
+				)
+			)
+		)
+		(embedded_fonts no)
+	)'''
+
+
 class KiCadSymbolProcessor:
     """Process and modify KiCad symbol (.kicad_sym) files."""
 
@@ -45,25 +301,22 @@ class KiCadSymbolProcessor:
         if not part:
             return content
 
+        # Only compute values for properties the symbol actually declares
+        present = {m.group(1) for m in _ALL_PROPS_RE.finditer(content)}
+
+        # Resolve each Part attribute / helper once, for declared properties only
+        values = {}
         for prop_name, source in cls.PROPERTY_MAP.items():
-            value = cls._get_property_value(part, source)
+            if prop_name not in present:
+                continue
+            if source.startswith("_"):
+                value = getattr(cls, source)(part)
+            else:
+                value = getattr(part, source, "") or ""
             if value:
-                content = cls._set_property(content, prop_name, value)
+                values[prop_name] = value
 
-        return content
-
-    @classmethod
-    def _get_property_value(cls, part: Part, source: str) -> str:
-        """Get a property value from the Part object."""
-        if source.startswith("_"):
-            # Call a method
-            method = getattr(cls, source, None)
-            if method:
-                return method(part)
-            return ""
-        else:
-            # Direct attribute
-            return getattr(part, source, "") or ""
+        return cls._set_properties(content, values)
 
     @classmethod
     def _get_value(cls, part: Part) -> str:
@@ -73,11 +326,13 @@ class KiCadSymbolProcessor:
         For others: MPN
         """
         # If there's a value field, use it (passives)
-        if part.value and part.value.strip():
-            return part.value
+        value = part.value
+        if value and value.strip():
+            return value
         # Otherwise use MPN
-        if part.mpn and part.mpn.strip():
-            return part.mpn
+        mpn = part.mpn
+        if mpn and mpn.strip():
+            return mpn
         return ""
 
     @classmethod
@@ -101,17 +356,33 @@ class KiCadSymbolProcessor:
         Handles the KiCad S-expression format:
         (property "Name" "value" ...)
         """
-        # Escape special characters for the replacement value
-        escaped_value = value.replace("\\", "\\\\").replace('"', '\\"')
-        
-        # Pattern to find the property and replace its value
-        # Matches: (property "PropName" "old_value"
-        pattern = rf'(\(property\s+"{re.escape(prop_name)}"\s+)"[^"]*"'
-        replacement = rf'\1"{escaped_value}"'
-        
-        new_content, count = re.subn(pattern, replacement, content)
-        
-        return new_content
+        return cls._set_properties(content, {prop_name: value})
+
+    @classmethod
+    def _set_properties(cls, content: str, values: dict) -> str:
+        """
+        Set several property values in a single pass over the content.
+
+        Args:
+            content: Symbol file content
+            values: Dict of property_name -> new value
+        """
+        if not values:
+            return content
+
+        # Escape special characters for the replacement values
+        escaped = {
+            name: value.replace("\\", "\\\\").replace('"', '\\"')
+            for name, value in values.items()
+        }
+
+        def replace_value(match):
+            escaped_value = escaped.get(match.group(2))
+            if escaped_value is None:
+                return match.group(0)
+            return f'{match.group(1)}"{escaped_value}"'
+
+        return _PROP_VALUE_RE.sub(replace_value, content)
 
     @classmethod
     def extract_properties(cls, content: str) -> dict:
@@ -122,17 +393,32 @@ class KiCadSymbolProcessor:
             Dict of property_name -> value
         """
         props = {}
-        # Match (property "Name" "Value" ...)
-        pattern = r'\(property\s+"([^"]+)"\s+"([^"]*)"'
-        for match in re.finditer(pattern, content):
-            props[match.group(1)] = match.group(2)
+        find = content.find
+        # Scan (property "Name" "Value" ...) with str.find: four quotes per property
+        pos = find('(property')
+        while pos >= 0:
+            pos += 9  # len('(property')
+            name_start = find('"', pos)
+            if name_start < 0:
+                break
+            name_end = find('"', name_start + 1)
+            value_start = find('"', name_end + 1)
+            value_end = find('"', value_start + 1)
+            if name_end < 0 or value_start < 0 or value_end < 0:
+                break
+            # Only whitespace may separate the keyword, name and value
+            if (content[pos:name_start].isspace() and name_end > name_start + 1
+                    and content[name_end + 1:value_start].isspace()):
+                props[content[name_start + 1:name_end]] = content[value_start + 1:value_end]
+                pos = value_end + 1
+            pos = find('(property', pos)
         return props
 
     @classmethod
     def get_symbol_name(cls, content: str) -> Optional[str]:
         """Extract the symbol name from the file content."""
         # Match (symbol "LibName:SymbolName" or just (symbol "SymbolName"
-        match = re.search(r'\(symbol\s+"([^"]+)"', content)
+        match = _SYMBOL_NAME_RE.search(content)
         if match:
             name = match.group(1)
             # Strip library prefix if present
@@ -155,20 +441,21 @@ class KiCadSymbolProcessor:
         escaped_name = new_name.replace("\\", "\\\\").replace('"', '\\"')
         
         # Replace the main symbol name (first occurrence)
-        pattern = r'(\(symbol\s+)"[^"]*"'
-        
         def replace_first(match):
             return f'{match.group(1)}"{escaped_name}"'
         
-        new_content = re.sub(pattern, replace_first, content, count=1)
+        new_content = _SYMBOL_DECL_RE.sub(replace_first, content, count=1)
         
         # Now rename nested symbols (units like OldName_0_1, OldName_1_1, etc.)
         if old_name:
-            # Pattern for nested symbol units: (symbol "OldName_N_N"
+            # Nested symbol units: (symbol "OldName_N_N"
             # where N is a digit - e.g., "0402_0_1", "0402_1_1"
-            nested_pattern = rf'(\(symbol\s+)"{re.escape(old_name)}_(\d+_\d+)"'
-            nested_replacement = rf'\1"{escaped_name}_\2"'
-            new_content = re.sub(nested_pattern, nested_replacement, new_content)
+            def replace_unit(match):
+                if match.group(2) != old_name:
+                    return match.group(0)
+                return f'{match.group(1)}"{escaped_name}_{match.group(3)}"'
+
+            new_content = _SYMBOL_UNIT_RE.sub(replace_unit, new_content)
         
         return new_content
 
@@ -179,16 +466,21 @@ class KiCadSymbolProcessor:
         
         Removes the library wrapper, returning just the symbol definition.
         """
+        # The block runs up to the library's closing "\n)", or to the end
+        # of the content if there is no wrapper
+        body = content.rstrip()
+        end = len(body) - 2 if body.endswith('\n)') else len(content)
+
         # Find the first (symbol "..." that's the main symbol (not nested)
         # The main symbol is indented with one tab after the header
-        match = re.search(r'(\t\(symbol\s+"[^"]+"\s*\n[\s\S]*?)(?=\n\)$|\Z)', content)
-        if match:
-            return match.group(1).rstrip()
+        start = content.find('\t(symbol "')
+        if 0 <= start < end:
+            return content[start:end].rstrip()
         
         # Fallback: find any (symbol block
-        match = re.search(r'(\(symbol\s+"[^"]+"\s*[\s\S]*?)(?=\n\)\s*$|\Z)', content)
-        if match:
-            block = match.group(1).rstrip()
+        start = content.find('(symbol "')
+        if 0 <= start < end:
+            block = content[start:end].rstrip()
             # Add proper indentation if missing
             if not block.startswith('\t'):
                 block = '\t' + block.replace('\n', '\n\t').rstrip('\t')
@@ -199,7 +491,9 @@ class KiCadSymbolProcessor:
     @staticmethod
     def _normalize_line_endings(content: str) -> str:
         """Normalize line endings to LF only (Unix-style)."""
-        return content.replace('\r\n', '\n').replace('\r', '\n')
+        if '\r' not in content:
+            return content
+        return _EOL_RE.sub('\n', content)
 
     @classmethod
     def add_symbol_to_library(cls, library_path: Path, symbol_content: str, symbol_name: str, 
@@ -221,8 +515,14 @@ class KiCadSymbolProcessor:
             "exists" if symbol already exists (skipped)
             "error" if failed
         """
-        import re
-        
+        with _library_lock(library_path):
+            return cls._add_symbol_to_library_locked(
+                library_path, symbol_content, symbol_name, update_existing)
+
+    @classmethod
+    def _add_symbol_to_library_locked(cls, library_path: Path, symbol_content: str,
+                                      symbol_name: str, update_existing: bool) -> str:
+        """add_symbol_to_library() body; the caller holds the library's lock."""
         # Normalize line endings (only strip trailing whitespace, preserve leading tab)
         symbol_content = cls._normalize_line_endings(symbol_content.rstrip())
         
@@ -244,12 +544,21 @@ class KiCadSymbolProcessor:
             library_path.write_text(lib_content, encoding='utf-8')
             return "added"
         
-        # Read existing library (try multiple encodings)
+        # Plain ASCII additions are checked against a memory map of the file
+        # and appended in place, without decoding the library
+        if not update_existing and symbol_content.isascii() and symbol_name.isascii():
+            result = cls._add_symbol_mapped(library_path, symbol_content, symbol_name)
+            if result is not None:
+                return result
+        
+        # Read existing library once, then try multiple encodings in memory
+        raw = library_path.read_bytes()
         lib_text = None
         encoding = 'utf-8'
-        for enc in ['utf-8', 'latin-1', 'cp1252']:
+        for enc in ('utf-8', 'latin-1', 'cp1252'):
             try:
-                lib_text = library_path.read_text(encoding=enc)
+                # Same newline handling read_text() applied
+                lib_text = cls._normalize_line_endings(raw.decode(enc))
                 encoding = enc
                 break
             except UnicodeDecodeError:
@@ -258,13 +567,12 @@ class KiCadSymbolProcessor:
         if lib_text is None:
             print("Warning: Could not read library file")
             return "error"
+        original_text = lib_text
         
         # Check if symbol already exists (by name)
-        # Pattern matches (symbol "SymbolName" ...) accounting for possible whitespace
-        escaped_name = re.escape(symbol_name)
-        pattern = rf'\(symbol\s+"{escaped_name}"\s+'
+        symbol_decl = f'(symbol "{symbol_name}"'
         
-        if re.search(pattern, lib_text):
+        if symbol_decl in lib_text:
             if update_existing:
                 # Remove existing symbol and add the new one
                 new_lib_text = cls._remove_symbol_from_library_text(lib_text, symbol_name)
@@ -279,16 +587,26 @@ class KiCadSymbolProcessor:
                 return "exists"
         else:
             # Also check if MPN already exists in library (to prevent duplicates with different names)
-            mpn_match = re.search(r'\(property\s+"MPN"\s+"([^"]+)"', symbol_content)
+            mpn_match = _MPN_RE.search(symbol_content)
             if mpn_match:
                 mpn_value = mpn_match.group(1)
                 if mpn_value:  # Don't check empty MPNs
-                    escaped_mpn = re.escape(mpn_value)
-                    mpn_pattern = rf'\(property\s+"MPN"\s+"{escaped_mpn}"'
-                    if re.search(mpn_pattern, lib_text):
+                    if f'(property "MPN" "{mpn_value}"' in lib_text:
                         print(f"Note: Symbol with MPN '{mpn_value}' already exists in library")
                         return "exists"
         
+        # Convert tabs to 2 spaces to match library format (if library uses spaces)
+        # Check what indentation the library uses
+        if '\t(symbol ' not in lib_text and '  (symbol ' in lib_text:
+            # Library uses spaces, convert tabs to spaces
+            symbol_content = symbol_content.replace('\t', '  ')
+        
+        # Plain additions are spliced in place at the end of the file
+        if lib_text is original_text and cls._append_to_library(library_path, symbol_content, encoding):
+            if update_existing and symbol_decl in symbol_content:
+                return "updated"
+            return "added"
+        
         # Insert new symbol before the final closing paren
         # Find the last ) in the file
         last_paren_idx = lib_text.rfind(')')
@@ -296,12 +614,6 @@ class KiCadSymbolProcessor:
             print("Warning: Invalid library file format")
             return "error"
         
-        # Convert tabs to 2 spaces to match library format (if library uses spaces)
-        # Check what indentation the library uses
-        if '\t(symbol ' not in lib_text and '  (symbol ' in lib_text:
-            # Library uses spaces, convert tabs to spaces
-            symbol_content = symbol_content.replace('\t', '  ')
-        
         # Ensure proper formatting: newline before symbol if needed
         before_text = lib_text[:last_paren_idx].rstrip()
         new_lib_text = before_text + "\n" + symbol_content + "\n" + lib_text[last_paren_idx:]
@@ -309,10 +621,68 @@ class KiCadSymbolProcessor:
         library_path.write_text(new_lib_text, encoding=encoding)
         
         # Return "updated" if we replaced an existing symbol
-        if update_existing and re.search(pattern, library_path.read_text(encoding=encoding)):
+        if update_existing and symbol_decl in new_lib_text:
             return "updated"
         return "added"
 
+    @classmethod
+    def _add_symbol_mapped(cls, library_path: Path, symbol_content: str, symbol_name: str) -> Optional[str]:
+        """
+        Dedup-check and append an ASCII symbol using an mmap of the library.
+        
+        Returns "added" or "exists", or None if the caller must fall back to
+        reading the whole library (empty file, CRLF tail, no closing paren).
+        """
+        mpn_match = _MPN_RE.search(symbol_content)
+        mpn_value = mpn_match.group(1) if mpn_match else ""
+        
+        with open(library_path, 'rb') as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                return None  # Empty file cannot be mapped
+            with mm:
+                if mm.find(f'(symbol "{symbol_name}"'.encode('ascii')) != -1:
+                    print(f"Note: Symbol '{symbol_name}' already exists in library")
+                    return "exists"
+                if mpn_value and mm.find(f'(property "MPN" "{mpn_value}"'.encode('ascii')) != -1:
+                    print(f"Note: Symbol with MPN '{mpn_value}' already exists in library")
+                    return "exists"
+                use_spaces = mm.find(b'\t(symbol ') == -1 and mm.find(b'  (symbol ') != -1
+        
+        if use_spaces:
+            symbol_content = symbol_content.replace('\t', '  ')
+        if cls._append_to_library(library_path, symbol_content, 'ascii'):
+            return "added"
+        return None
+
+    @staticmethod
+    def _append_to_library(library_path: Path, symbol_content: str, encoding: str) -> bool:
+        """
+        Splice a symbol in before the library's closing paren without rewriting the file.
+        
+        Only the tail of the file is read; everything from the whitespace before
+        the last ')' onward is rewritten. Returns False (nothing written) when the
+        tail has CRLF line endings or no closing paren, so the caller can fall back
+        to a full rewrite, which also normalizes line endings.
+        """
+        with open(library_path, 'r+b') as f:
+            size = f.seek(0, os.SEEK_END)
+            tail_start = f.seek(max(0, size - _APPEND_TAIL_BYTES))
+            tail = f.read()
+            if b'\r' in tail:
+                return False
+            last_paren_idx = tail.rfind(b')')
+            if last_paren_idx == -1:
+                return False
+            head_end = len(tail[:last_paren_idx].rstrip())
+            if head_end == 0 and tail_start > 0:
+                return False
+            f.seek(tail_start + head_end)
+            f.write(("\n" + symbol_content + "\n").encode(encoding) + tail[last_paren_idx:])
+            f.truncate()
+        return True
+
     @classmethod
     def _remove_symbol_from_library_text(cls, lib_text: str, symbol_name: str) -> str:
         """
@@ -325,8 +695,6 @@ class KiCadSymbolProcessor:
         Returns:
             Modified library text with symbol removed, or None if failed
         """
-        import re
-        
         escaped_name = re.escape(symbol_name)
         # Match the entire symbol block including nested symbols
         # Symbol blocks start with (symbol "name" and end with the matching )
@@ -370,16 +738,16 @@ class KiCadSymbolProcessor:
 
     @classmethod
     def list_symbols_in_library(cls, library_path: Path) -> list[str]:
-        """List all symbol names in a library file using kiutils."""
+        """List all top-level symbol names in a library file."""
         if not library_path.exists():
             return []
         
         try:
-            lib = SymbolLib.from_file(library_path)
-            return [sym.entryName for sym in lib.symbols]
-        except Exception as e:
+            lib_text = library_path.read_text(encoding='utf-8', errors='replace')
+        except OSError as e:
             print(f"Warning: Error reading library: {e}")
             return []
+        return _TOP_SYMBOL_RE.findall(lib_text)
 
     @classmethod
     def _is_polarized_capacitor(cls, part) -> bool:
@@ -396,7 +764,7 @@ class KiCadSymbolProcessor:
         #   04 = Polymer (Al or Ta)
         #   06 = Supercapacitor EDLC
         cc = getattr(part, 'cc', '') or ''
-        if cc in ('02', '03', '04', '06'):
+        if cc in _POLARIZED_CC:
             return True
         
         # Check footprint name: "CP_" prefix indicates polarized
@@ -412,20 +780,36 @@ class KiCadSymbolProcessor:
                 break
         
         # Polarized dielectric types
-        polarized_keywords = ["ALUMINUM", "TANTALUM", "POLYMER", "ELECTROLYTIC", "POLARIZED", "ELCO"]
-        for kw in polarized_keywords:
-            if kw in dielectric:
-                return True
+        if _POLARIZED_RE.search(dielectric):
+            return True
         
         # Check description for clues
         desc = (getattr(part, 'description', '') or "").upper()
-        for kw in polarized_keywords:
-            if kw in desc:
-                return True
+        if _POLARIZED_RE.search(desc):
+            return True
         
         # Default: assume non-polarized (MLCC is most common)
         return False
 
+    @staticmethod
+    def sanitize_mpn(mpn: str) -> str:
+        """Replace characters that are not allowed in symbol names with '_'."""
+        if any(c in mpn for c in _MPN_FORBIDDEN):
+            return mpn.translate(_MPN_SANITIZE_TABLE)
+        return mpn
+
+    @staticmethod
+    def passive_symbol_name(value: str, mpn: str) -> str:
+        """
+        Name of an auto-generated passive symbol: "Value MPN", or whichever
+        of the two is set.  The MPN is sanitized for use in a symbol name.
+        Returns "" if both are empty.
+        """
+        mpn_sanitized = KiCadSymbolProcessor.sanitize_mpn(mpn)
+        if value and mpn_sanitized:
+            return f"{value} {mpn_sanitized}"
+        return mpn_sanitized or value
+
     @classmethod
     def generate_passive_symbol(cls, part: Part, library_path: Path, update_existing: bool = False) -> str:
         """
@@ -442,8 +826,6 @@ class KiCadSymbolProcessor:
             "exists" if symbol already exists
             "error" if failed (e.g., polarized cap, inductor)
         """
-        import re
-        
         # Determine component type from family code
         # ff: "01" = Capacitor, "02" = Resistor, "03" = Inductor
         component_type = "resistor"  # default
@@ -466,91 +848,42 @@ class KiCadSymbolProcessor:
         # Generate symbol name: "Value MPN"
         value = part.value or ""
         mpn = part.mpn or ""
-        mpn_sanitized = re.sub(r'[<>:"/\\|?*]', '_', mpn)
-        
-        if value and mpn_sanitized:
-            symbol_name = f"{value} {mpn_sanitized}"
-        elif mpn_sanitized:
-            symbol_name = mpn_sanitized
-        elif value:
-            symbol_name = value
-        else:
+        symbol_name = cls.passive_symbol_name(value, mpn)
+        if not symbol_name:
             return "error"  # Can't generate without name
         
         # Determine footprint short name (0402, 0603, etc.)
         fp = part.kicad_footprint or ""
-        fp_short = ""
         # Check standard SMD sizes
-        for size in ["0201", "0402", "0603", "0805", "1206", "1210", "2010", "2512"]:
-            if size in fp:
-                fp_short = size
-                break
+        match = _FP_SIZE_RE.search(fp)
+        fp_short = match.group(0) if match else ""
         # Check electrolytic cap sizes
         if not fp_short and "CP_Elec" in fp:
             # Extract size like "4x5.7" from "CP_Elec_4x5.7"
-            match = re.search(r'CP_Elec_(\d+\.?\d*x\d+\.?\d*)', fp)
+            match = _FP_ELEC_RE.search(fp)
             if match:
                 fp_short = match.group(1)
         
-        # Generate symbol shape based on component type
+        # Symbol shape based on component type (static, pre-rendered bodies)
         if component_type == "capacitor":
             # Capacitor: two parallel lines
-            symbol_shape = f'''(symbol "{symbol_name}_0_1"
-			(polyline
-				(pts
-					(xy -2.032 -0.762)
-					(xy 2.032 -0.762)
-				)
-				(stroke
-					(width 0.508)
-					(type default)
-				)
-				(fill
-					(type none)
-				)
-			)
-			(polyline
-				(pts
-					(xy -2.032 0.762)
-					(xy 2.032 0.762)
-				)
-				(stroke
-					(width 0.508)
-					(type default)
-				)
-				(fill
-					(type none)
-				)
-			)
-		)'''
+            symbol_shape = _CAPACITOR_SHAPE
             pin_positions = (3.81, -3.81)  # matching KiCad standard
             pin_length = 2.794
         else:
             # Resistor: rectangle
-            symbol_shape = f'''(symbol "{symbol_name}_0_1"
-			(rectangle
-				(start -1.016 2.54)
-				(end 1.016 -2.54)
-				(stroke
-					(width 0.254)
-					(type default)
-				)
-				(fill
-					(type none)
-				)
-			)
-		)'''
+            symbol_shape = _RESISTOR_SHAPE
             pin_positions = (3.81, -3.81)  # pins for resistor
             pin_length = 1.27  # connects exactly to rectangle body edge
         
         # Generate distributor properties (DIST1, DIST2, etc.)
         dist_properties = ""
         if part.distributor:
-            import json
             try:
                 distributors = json.loads(part.distributor)
                 if isinstance(distributors, list):
                     y_offset = -19.304
+                    dist_blocks = []
                     for i, dist in enumerate(distributors, 1):
                         url = dist.get('url', '')
                         name = dist.get('name', '')
@@ -560,186 +893,35 @@ class KiCadSymbolProcessor:
                         else:
                             dist_value = url
                         dist_value = dist_value.replace('"', "'")
-                        dist_properties += f'''(property "DIST{i}" "{dist_value}"
-			(at 2.286 {y_offset} 0)
-			(show_name)
-			(effects
-				(font
-					(size 1.27 1.27)
-				)
-				(justify left)
-				(hide yes)
-			)
-		)
-		'''
+                        dist_blocks.append(_DIST_PROPERTY_TEMPLATE.format(
+                            index=i, value=dist_value, y_offset=y_offset,
+                        ))
                         y_offset -= 2.286
+                    dist_properties = "".join(dist_blocks)
             except (json.JSONDecodeError, TypeError):
                 # Legacy single URL format
                 dist_value = str(part.distributor).replace('"', "'")
-                dist_properties = f'''(property "DIST1" "{dist_value}"
-			(at 2.286 -19.304 0)
-			(show_name)
-			(effects
-				(font
-					(size 1.27 1.27)
-				)
-				(justify left)
-				(hide yes)
-			)
-		)
-		'''
+                dist_properties = _DIST_PROPERTY_TEMPLATE.format(
+                    index=1, value=dist_value, y_offset=-19.304,
+                )
         
         # Generate symbol content with proper template
-        symbol_content = f'''	(symbol "{symbol_name}"
-		(exclude_from_sim no)
-		(in_bom yes)
-		(on_board yes)
-		(property "Reference" "{ref_des}"
-			(at 2.032 2.032 0)
-			(effects
-				(font
-					(size 1.27 1.27)
-				)
-				(justify left)
-			)
-		)
-		(property "Value" "{value}"
-			(at 2.032 0 0)
-			(effects
-				(font
-					(size 1.27 1.27)
-				)
-				(justify left)
-			)
-		)
-		(property "Footprint" "{part.kicad_footprint or default_fp}"
-			(at 2.032 -4.064 0)
-			(show_name)
-			(effects
-				(font
-					(size 1.27 1.27)
-				)
-				(justify left)
-				(hide yes)
-			)
-		)
-		(property "Datasheet" "{part.datasheet or ''}"
-			(at 2.032 -14.986 0)
-			(show_name)
-			(effects
-				(font
-					(size 1.27 1.27)
-				)
-				(justify left)
-				(hide yes)
-			)
-		)
-		(property "Description" "{(part.description or '').replace('"', "'")}"
-			(at 2.032 -8.382 0)
-			(show_name)
-			(effects
-				(font
-					(size 1.27 1.27)
-				)
-				(justify left)
-				(hide yes)
-			)
-		)
-		(property "LCSC_PART" ""
-			(at 2.032 -12.954 0)
-			(show_name)
-			(effects
-				(font
-					(size 1.27 1.27)
-				)
-				(justify left)
-				(hide yes)
-			)
-		)
-		(property "ROHS" "YES"
-			(at 2.032 -6.35 0)
-			(show_name)
-			(effects
-				(font
-					(size 1.27 1.27)
-				)
-				(justify left)
-				(hide yes)
-			)
-		)
-		(property "FOOTPRINT_SHORT" "{fp_short}"
-			(at 2.032 -2.032 0)
-			(effects
-				(font
-					(size 1.27 1.27)
-				)
-				(justify left)
-			)
-		)
-		(property "MFR" "{part.manufacturer or ''}"
-			(at 2.032 -10.668 0)
-			(show_name)
-			(effects
-				(font
-					(size 1.27 1.27)
-				)
-				(justify left)
-				(hide yes)
-			)
-		)
-		(property "MPN" "{mpn}"
-			(at 2.032 -17.018 0)
-			(show_name)
-			(effects
-				(font
-					(size 1.27 1.27)
-				)
-				(justify left)
-				(hide yes)
-			)
-		)
-		{dist_properties}
-		{symbol_shape}
-		(symbol "{symbol_name}_1_1"
-			(pin passive line
-				(at 0 {pin_positions[0]} 270)
-				(length {pin_length})
-				(name "~"
-					(effects
-						(font
-							(size 1.27 1.27)
-						)
-					)
-				)
-				(number "1"
-					(effects
-						(font
-							(size 1.27 1.27)
-						)
-					)
-				)
-			)
-			(pin passive line
-				(at 0 {pin_positions[1]} 90)
-				(length {pin_length})
-				(name "~"
-					(effects
-						(font
-							(size 1.27 1.27)
-						)
-					)
-				)
-				(number "2"
-					(effects
-						(font
-							(size 1.27 1.27)
-						)
-					)
-				)
-			)
-		)
-		(embedded_fonts no)
-	)'''
+        symbol_content = _PASSIVE_SYMBOL_TEMPLATE.format_map({
+            "symbol_name": symbol_name,
+            "ref_des": ref_des,
+            "value": value,
+            "footprint": part.kicad_footprint or default_fp,
+            "datasheet": part.datasheet or '',
+            "description": (part.description or '').replace('"', "'"),
+            "fp_short": fp_short,
+            "manufacturer": part.manufacturer or '',
+            "mpn": mpn,
+            "dist_properties": dist_properties,
+            "symbol_shape": symbol_shape,
+            "pin_top": pin_positions[0],
+            "pin_bottom": pin_positions[1],
+            "pin_length": pin_length,
+        })
         
         return cls.add_symbol_to_library(library_path, symbol_content, symbol_name, update_existing=update_existing)
 
@@ -9,11 +9,14 @@ import abc
 import asyncio
 import enum
 import logging
+import re
 import struct
-import time
 import threading
+import time
+from functools import lru_cache, reduce
 from io import BytesIO
-from typing import Optional, Dict, List, Callable
+from operator import xor
+from typing import Optional, Dict, List, Callable, Sequence
 
 from PIL import Image
 
@@ -24,6 +27,12 @@ logger = logging.getLogger(__name__)
 # Packet Protocol
 # =============================================================================
 
+def _frame_packet(type_: int, data: bytes) -> bytes:
+    """Wrap data in on-wire Niimbot framing (header, length, checksum, trailer)."""
+    checksum = reduce(xor, data, type_ ^ len(data))
+    return b"\x55\x55" + bytes((type_, len(data))) + bytes(data) + bytes((checksum, 0xAA, 0xAA))
+
+
 class NiimbotPacket:
     """
     Niimbot packet format:
@@ -42,9 +51,7 @@ class NiimbotPacket:
         len_ = pkt[3]
         data = pkt[4:4 + len_]
         
-        checksum = type_ ^ len_
-        for b in data:
-            checksum ^= b
+        checksum = reduce(xor, data, type_ ^ len_)
         
         if checksum != pkt[-3]:
             raise ValueError(f"Checksum mismatch: expected {checksum}, got {pkt[-3]}")
@@ -52,10 +59,7 @@ class NiimbotPacket:
         return cls(type_, data)
 
     def to_bytes(self) -> bytes:
-        checksum = self.type ^ len(self.data)
-        for b in self.data:
-            checksum ^= b
-        return bytes([0x55, 0x55, self.type, len(self.data), *self.data, checksum, 0xAA, 0xAA])
+        return _frame_packet(self.type, self.data)
 
     def __repr__(self):
         return f"<NiimbotPacket type=0x{self.type:02x} data={self.data.hex()}>"
@@ -91,6 +95,80 @@ class PrinterInfo(enum.IntEnum):
     HARDWARE_VERSION = 12
 
 
+# Row packet header: row number, three count bytes, repeat count
+_ROW_HEADER = struct.Struct(">HBBBB")
+
+# MSB-first positions of the set bits in each byte value (bit 0 = leftmost pixel)
+_SET_BIT_POSITIONS = tuple(
+    tuple(bit for bit in range(8) if value & (0x80 >> bit)) for value in range(256)
+)
+
+
+# Gray level below which a pixel prints black; higher = darker print
+PRINT_THRESHOLD = 180
+
+
+@lru_cache(maxsize=16)
+def _threshold_lut(threshold: int) -> tuple:
+    """256-entry Image.point table mapping pixels darker than threshold to 255 (black bit)."""
+    return tuple(255 if x < threshold else 0 for x in range(256))
+
+
+def _encode_rows(image: Image.Image, row_width: int, threshold: int = PRINT_THRESHOLD):
+    """
+    Convert image to a stream of framed Niimbot row packets (bytes), each
+    row padded to row_width pixels (the printhead width).
+    """
+    # Threshold straight to 1-bit with black as the set bit (1 = black)
+    # Higher threshold = more black pixels = darker print
+    img = image if image.mode == "L" else image.convert("L")
+    img = img.point(_threshold_lut(threshold), '1')
+    
+    # Mode "1" raw data is already MSB-first packed rows, padded to whole bytes;
+    # pad each row out to the printhead width as it is sliced off
+    packed = img.tobytes()
+    stride = (img.width + 7) // 8
+    row_pad = bytes(max(0, (row_width + 7) // 8 - stride))
+    
+    for y in range(img.height):
+        row_data = packed[y * stride:(y + 1) * stride] + row_pad
+        
+        # Count pixels for packet header
+        counts = _count_pixels(row_data)
+        black_count = counts[1] | (counts[2] << 8)
+        
+        # Use indexed packet for sparse rows (≤6 black pixels)
+        if black_count <= 6:
+            yield _make_indexed_packet(y, 1, row_data, counts)
+        else:
+            yield _make_bitmap_packet(y, 1, row_data, counts)
+
+
+def _count_pixels(data: bytes) -> tuple:
+    """Count black pixels for packet header."""
+    total = int.from_bytes(data, "big").bit_count()
+    return (0, total & 0xFF, (total >> 8) & 0xFF)
+
+
+def _make_bitmap_packet(row: int, repeats: int, data: bytes, counts: tuple) -> bytes:
+    """Create regular bitmap row packet, already framed for the wire."""
+    payload = _ROW_HEADER.pack(row, *counts, repeats) + data
+    return _frame_packet(RequestCode.PRINT_BITMAP_ROW, payload)
+
+
+def _make_indexed_packet(row: int, repeats: int, data: bytes, counts: tuple) -> bytes:
+    """Create indexed bitmap row packet for sparse data, already framed for the wire."""
+    # Build index of black pixel positions, skipping empty bytes
+    indexes = [
+        byte_pos * 8 + bit_pos
+        for byte_pos, byte_val in enumerate(data) if byte_val
+        for bit_pos in _SET_BIT_POSITIONS[byte_val]
+    ]
+    
+    payload = _ROW_HEADER.pack(row, *counts, repeats) + struct.pack(f">{len(indexes)}H", *indexes)
+    return _frame_packet(RequestCode.PRINT_BITMAP_ROW_INDEXED, payload)
+
+
 # =============================================================================
 # Bluetooth Transport
 # =============================================================================
@@ -102,11 +180,18 @@ class NiimbotTransport:
         self._address = address
         self._client = None
         self._char_uuid = None
-        self._notification_event: Optional[asyncio.Event] = None
-        self._notification_data: Optional[bytes] = None
+        self._response_queue: Optional[asyncio.Queue] = None
         self._connected = False
         self._loop: Optional[asyncio.AbstractEventLoop] = None
         self._thread: Optional[threading.Thread] = None
+        self._ready_event = threading.Event()
+        self._mtu = 23
+        self._pending_writes = bytearray()
+    
+    @property
+    def is_connected(self) -> bool:
+        """True while the BLE link is up (no traffic, just the client state)."""
+        return self._connected and self._client is not None and self._client.is_connected
     
     def connect(self) -> bool:
         """Connect to the Niimbot printer. Returns True on success."""
@@ -115,22 +200,24 @@ class NiimbotTransport:
             asyncio.set_event_loop(self._loop)
             try:
                 self._loop.run_until_complete(self._async_connect())
+                self._ready_event.set()
                 self._loop.run_forever()
             except Exception as e:
                 logger.error(f"BLE connection error: {e}")
+                # Wake connect() immediately; _connected stays False
+                self._ready_event.set()
         
+        self._ready_event.clear()
         self._thread = threading.Thread(target=run_loop, daemon=True)
         self._thread.start()
         
-        # Wait for connection
-        timeout = 15.0
-        elapsed = 0.0
-        while not self._connected and elapsed < timeout:
-            time.sleep(0.1)
-            elapsed += 0.1
+        # Wait for connection (signalled on success or failure)
+        if not self._ready_event.wait(timeout=15.0):
+            logger.error(f"Connection timeout to {self._address}")
+            return False
         
         if not self._connected:
-            logger.error(f"Connection timeout to {self._address}")
+            logger.error(f"Failed to connect to {self._address}")
             return False
         
         logger.info(f"Connected to Niimbot at {self._address}")
@@ -143,10 +230,17 @@ class NiimbotTransport:
         self._client = BleakClient(self._address)
         await self._client.connect()
         
-        # Request larger MTU for better throughput (default is often 23 bytes)
+        # Request larger MTU for better throughput (default is often 23 bytes);
+        # BlueZ reports the default until the MTU is explicitly acquired
         try:
-            mtu = await self._client.mtu_size
-            logger.info(f"BLE MTU size: {mtu}")
+            acquire_mtu = getattr(self._client._backend, "_acquire_mtu", None)
+            if acquire_mtu:
+                await acquire_mtu()
+        except Exception as e:
+            logger.debug(f"MTU acquire failed: {e}")
+        try:
+            self.set_mtu(self._client.mtu_size)
+            logger.info(f"BLE MTU size: {self._mtu}")
         except Exception:
             pass
         
@@ -165,17 +259,24 @@ class NiimbotTransport:
         if not self._char_uuid:
             raise ConnectionError("Could not find Niimbot BLE characteristic")
         
-        # Start notifications once and keep them active for the session
+        # Start notifications once and keep them active for the session;
+        # responses are demultiplexed through a queue owned by this loop
+        self._response_queue = asyncio.Queue()
         await self._client.start_notify(self._char_uuid, self._notification_handler)
         
         self._connected = True
         logger.info(f"BLE connected, characteristic: {self._char_uuid}")
     
+    def set_mtu(self, mtu: int):
+        """
+        Set the ATT MTU that sizes coalesced writes (see _write_bytes).
+        Values below the BLE default of 23 are ignored.
+        """
+        self._mtu = max(23, int(mtu))
+    
     def _notification_handler(self, sender, data: bytes):
         """Handle BLE notifications."""
-        self._notification_data = data
-        if self._notification_event:
-            self._notification_event.set()
+        self._response_queue.put_nowait(bytes(data))
     
     async def _send_command(self, code: int, data: bytes, timeout: float = 5.0) -> Optional[NiimbotPacket]:
         """Send command and wait for response."""
@@ -183,27 +284,52 @@ class NiimbotTransport:
             raise ConnectionError("Not connected")
         
         packet = NiimbotPacket(code, data)
-        self._notification_event = asyncio.Event()
+        await self._flush_writes()
+        
+        # Drop stale notifications left over from timed-out commands
+        while not self._response_queue.empty():
+            self._response_queue.get_nowait()
         
         await self._client.write_gatt_char(self._char_uuid, packet.to_bytes())
         
         try:
-            await asyncio.wait_for(self._notification_event.wait(), timeout)
-            response = NiimbotPacket.from_bytes(self._notification_data)
+            raw = await asyncio.wait_for(self._response_queue.get(), timeout)
+            response = NiimbotPacket.from_bytes(raw)
         except asyncio.TimeoutError:
             logger.warning(f"Timeout waiting for response to command 0x{code:02x}")
             response = None
-        finally:
-            self._notification_event = None
         
         return response
     
     async def _write_raw(self, packet: NiimbotPacket):
-        """Write packet without waiting for response (fire-and-forget for speed)."""
+        """Queue packet for a write without response, see _write_bytes()."""
+        await self._write_bytes(packet.to_bytes())
+    
+    async def _write_bytes(self, raw: bytes):
+        """
+        Queue an already framed packet for a write without response
+        (fire-and-forget for speed).
+        
+        Packets are self-delimiting (55 55 ... AA AA), so consecutive packets are
+        coalesced into a single GATT write of up to MTU - 3 bytes. Call
+        _flush_writes() to send whatever is still pending.
+        """
         if not self._client or not self._client.is_connected:
             raise ConnectionError("Not connected")
+        if self._pending_writes and len(self._pending_writes) + len(raw) > self._mtu - 3:
+            await self._flush_writes()
+        self._pending_writes += raw
+        if len(self._pending_writes) >= self._mtu - 3:
+            await self._flush_writes()
+    
+    async def _flush_writes(self):
+        """Send any coalesced packets queued by _write_bytes."""
+        if not self._pending_writes:
+            return
+        chunk = bytes(self._pending_writes)
+        self._pending_writes.clear()
         # Use response=False for write-without-response (much faster for bulk data)
-        await self._client.write_gatt_char(self._char_uuid, packet.to_bytes(), response=False)
+        await self._client.write_gatt_char(self._char_uuid, chunk, response=False)
     
     def run_async(self, coro):
         """Run async coroutine in the BLE thread."""
@@ -246,11 +372,73 @@ class NiimbotPrinter:
         self._transport = transport
         self._model = model.lower()
         self._max_width = self.MODEL_SPECS.get(self._model, 384)
+        # Held for a whole print job so heartbeats never interleave with it
+        self._job_lock = threading.Lock()
     
     def close(self):
         """Close connection."""
         self._transport.disconnect()
     
+    def heartbeat(self, timeout: float = 3.0) -> bool:
+        """
+        Send a heartbeat to keep the BLE link from idling out.
+        
+        Returns False if the printer did not answer or the link is down.
+        A print job in progress counts as alive and is not interrupted.
+        """
+        if not self._transport.is_connected:
+            return False
+        if not self._job_lock.acquire(blocking=False):
+            return True
+        try:
+            pkt = self._transport.run_async(
+                self._transport._send_command(RequestCode.HEARTBEAT, b"\x01", timeout=timeout)
+            )
+            return pkt is not None
+        except Exception as e:
+            logger.warning(f"Heartbeat failed: {e}")
+            return False
+        finally:
+            self._job_lock.release()
+    
+    def wait_until_ready(self, timeout: float = 5.0, poll_interval: float = 0.05,
+                         min_gap: float = 0.2, fallback_gap: float = 0.5) -> bool:
+        """
+        Block until the printer is idle after a job.
+        
+        Polls GET_PRINT_STATUS until both the print and the feed progress
+        report 100%; the printer keeps answering commands while it is still
+        feeding, so a reply alone does not mean it is done. At least min_gap
+        seconds pass before returning, or fallback_gap seconds for firmware
+        that does not report progress.
+        Returns False if the printer was not idle within timeout seconds.
+        """
+        start = time.monotonic()
+        deadline = start + timeout
+        gap = min_gap
+        with self._job_lock:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                try:
+                    status = self._transport.run_async(self._get_status(timeout=min(remaining, 0.5)))
+                except ConnectionError:
+                    return False
+                if "feed_progress" in status:
+                    if status["print_progress"] >= 100 and status["feed_progress"] >= 100:
+                        break
+                elif status:
+                    # No progress reported; fall back to a fixed gap
+                    gap = fallback_gap
+                    break
+                time.sleep(poll_interval)
+        
+        rest = start + gap - time.monotonic()
+        if rest > 0:
+            time.sleep(rest)
+        return True
+    
     def print_image(self, image: Image.Image, density: int = 3, copies: int = 1,
                     progress_callback: Optional[Callable[[int, int], None]] = None):
         """
@@ -265,17 +453,36 @@ class NiimbotPrinter:
         if image.width > self._max_width:
             raise ValueError(f"Image width {image.width}px exceeds max {self._max_width}px for {self._model}")
         
+        # Encode on the calling thread so the BLE loop only has to stream bytes
+        packets = list(self._encode_image(image, threshold=PRINT_THRESHOLD))
+        self.print_packed(packets, image.width, image.height, density, copies, progress_callback)
+    
+    def print_packed(self, packets: Sequence[bytes], width: int, height: int, density: int = 3, copies: int = 1,
+                     progress_callback: Optional[Callable[[int, int], None]] = None):
+        """
+        Print pre-encoded row packets, e.g. from render_label_packets().
+        
+        Like print_image(), but skips thresholding and packing; rows must be
+        padded to this printer's width.
+        """
+        if width > self._max_width:
+            raise ValueError(f"Image width {width}px exceeds max {self._max_width}px for {self._model}")
+        
         # Clamp density for certain models
         if self._model in ("b18", "d11", "d110") and density > 3:
             density = 3
         
-        logger.info(f"Starting print: {image.width}x{image.height}px, density={density}, copies={copies}")
-        self._transport.run_async(self._async_print(image, density, copies, progress_callback))
+        logger.info(f"Starting print: {width}x{height}px, density={density}, copies={copies}")
+        with self._job_lock:
+            self._transport.run_async(
+                self._async_print(packets, width, height, density, copies, progress_callback)
+            )
         logger.info("Print complete")
     
-    async def _async_print(self, image: Image.Image, density: int, copies: int,
-                          progress_callback: Optional[Callable[[int, int], None]]):
-        """Async print sequence."""
+    async def _async_print(self, packets: Sequence[bytes], width: int, height: int,
+                           density: int, copies: int,
+                           progress_callback: Optional[Callable[[int, int], None]]):
+        """Async print sequence for pre-encoded row packets."""
         try:
             # 1. Set density
             await self._set_density(density)
@@ -294,20 +501,18 @@ class NiimbotPrinter:
             await asyncio.sleep(0.02)
             
             # 5. Set page dimensions
-            await self._set_page_size(image.height, image.width, copies)
+            await self._set_page_size(height, width, copies)
             await asyncio.sleep(0.02)
             
             # 6. Send image rows (minimal delays for speed)
-            total_rows = image.height
-            row_num = 0
-            for packet in self._encode_image(image, threshold=180):
-                await self._transport._write_raw(packet)
-                row_num += 1
+            # Each MTU-sized flush in _write_bytes awaits the BLE write, which
+            # already yields to the loop; no artificial sleeps are needed
+            total_rows = height
+            for row_num, packet in enumerate(packets, 1):
+                await self._transport._write_bytes(packet)
                 if progress_callback and row_num % 50 == 0:
                     progress_callback(row_num, total_rows)
-                # Tiny yield to prevent blocking - no real delay needed with write-without-response
-                if row_num % 8 == 0:
-                    await asyncio.sleep(0)
+            await self._transport._flush_writes()
             
             if progress_callback:
                 progress_callback(total_rows, total_rows)
@@ -336,69 +541,9 @@ class NiimbotPrinter:
                 pass
             raise
     
-    def _encode_image(self, image: Image.Image, threshold: int = 180):
-        """Convert image to Niimbot packet stream."""
-        # Convert to 1-bit monochrome
-        # Higher threshold = more black pixels = darker print
-        img = image.convert("L")
-        img = img.point(lambda x: 0 if x < threshold else 255, '1')
-        
-        for y in range(img.height):
-            # Build row as bit array (1 = black)
-            row_bits = []
-            for x in range(img.width):
-                pixel = img.getpixel((x, y))
-                row_bits.append(1 if pixel == 0 else 0)  # 0 in 1-bit = black
-            
-            # Pad to printhead width
-            while len(row_bits) < self._max_width:
-                row_bits.append(0)
-            
-            # Convert to bytes (MSB first)
-            row_bytes = []
-            for i in range(0, len(row_bits), 8):
-                byte_val = 0
-                for j in range(8):
-                    if i + j < len(row_bits) and row_bits[i + j]:
-                        byte_val |= (1 << (7 - j))
-                row_bytes.append(byte_val)
-            
-            row_data = bytes(row_bytes)
-            black_count = sum(row_bits)
-            
-            # Count pixels for packet header
-            counts = self._count_pixels(row_data)
-            
-            # Use indexed packet for sparse rows (≤6 black pixels)
-            if black_count <= 6:
-                yield self._make_indexed_packet(y, 1, row_data)
-            else:
-                yield self._make_bitmap_packet(y, 1, row_data, counts)
-    
-    def _count_pixels(self, data: bytes) -> tuple:
-        """Count black pixels for packet header."""
-        total = sum(bin(b).count('1') for b in data)
-        return (0, total & 0xFF, (total >> 8) & 0xFF)
-    
-    def _make_bitmap_packet(self, row: int, repeats: int, data: bytes, counts: tuple) -> NiimbotPacket:
-        """Create regular bitmap row packet."""
-        payload = struct.pack(">H", row) + bytes(counts) + bytes([repeats]) + data
-        return NiimbotPacket(RequestCode.PRINT_BITMAP_ROW, payload)
-    
-    def _make_indexed_packet(self, row: int, repeats: int, data: bytes) -> NiimbotPacket:
-        """Create indexed bitmap row packet for sparse data."""
-        counts = self._count_pixels(data)
-        
-        # Build index of black pixel positions
-        indexes = []
-        for byte_pos, byte_val in enumerate(data):
-            for bit_pos in range(8):
-                if byte_val & (1 << (7 - bit_pos)):
-                    pixel_pos = byte_pos * 8 + bit_pos
-                    indexes.extend([(pixel_pos >> 8) & 0xFF, pixel_pos & 0xFF])
-        
-        payload = struct.pack(">H", row) + bytes(counts) + bytes([repeats]) + bytes(indexes)
-        return NiimbotPacket(RequestCode.PRINT_BITMAP_ROW_INDEXED, payload)
+    def _encode_image(self, image: Image.Image, threshold: int = PRINT_THRESHOLD):
+        """Convert image to a stream of framed Niimbot row packets (bytes)."""
+        return _encode_rows(image, self._max_width, threshold)
     
     # Command helpers
     async def _set_density(self, n: int) -> bool:
@@ -431,12 +576,55 @@ class NiimbotPrinter:
         pkt = await self._transport._send_command(RequestCode.SET_PAGE_SIZE, data)
         return pkt and bool(pkt.data[0]) if pkt else False
     
-    async def _get_status(self) -> dict:
-        pkt = await self._transport._send_command(RequestCode.GET_PRINT_STATUS, b"\x01")
-        if pkt and len(pkt.data) >= 2:
-            page = struct.unpack(">H", pkt.data[:2])[0]
-            return {"page": page}
-        return {"page": 0}
+    async def _get_status(self, timeout: float = 5.0) -> dict:
+        """
+        {"page": n}, plus "print_progress" and "feed_progress" (0-100) when
+        the firmware reports them; empty if the printer did not answer.
+        """
+        pkt = await self._transport._send_command(RequestCode.GET_PRINT_STATUS, b"\x01", timeout=timeout)
+        if pkt is None:
+            return {}
+        status = {"page": 0}
+        if len(pkt.data) >= 2:
+            status["page"] = struct.unpack(">H", pkt.data[:2])[0]
+        if len(pkt.data) >= 4:
+            status["print_progress"], status["feed_progress"] = pkt.data[2], pkt.data[3]
+        return status
+
+
+class NiimbotKeepAlive:
+    """
+    Background heartbeat for a connected printer.
+    
+    BLE stacks drop idle links; pinging every interval seconds keeps the
+    connection (and its multi-second handshake) alive between prints.
+    When a heartbeat fails, on_dead is called once and the thread exits.
+    """
+    
+    def __init__(self, printer: NiimbotPrinter, interval: float = 20.0,
+                 on_dead: Optional[Callable[[], None]] = None):
+        self._printer = printer
+        self._interval = interval
+        self._on_dead = on_dead
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="niimbot-keepalive")
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self):
+        """Stop pinging; does not disconnect the printer."""
+        self._stop_event.set()
+    
+    def _run(self):
+        while not self._stop_event.wait(self._interval):
+            if not self._printer.heartbeat():
+                if not self._stop_event.is_set():
+                    logger.warning("Niimbot printer stopped responding")
+                    if self._on_dead:
+                        self._on_dead()
+                return
 
 
 # =============================================================================
@@ -447,25 +635,43 @@ class NiimbotScanner:
     """Scanner to find Niimbot BLE devices."""
     
     @staticmethod
-    async def scan_async(name_filter: str = "B1", timeout: float = 10.0) -> List[Dict]:
-        """Scan for Niimbot devices asynchronously."""
-        from bleak import BleakScanner
+    async def scan_async(name_filter: str = "B1", timeout: float = 10.0,
+                         stop_on_first: bool = True) -> List[Dict]:
+        """
+        Scan for Niimbot devices asynchronously.
         
-        devices = await BleakScanner.discover(timeout=timeout)
-        results = []
+        With stop_on_first, scanning ends as soon as one matching device is
+        seen instead of running for the full timeout.
+        """
+        from bleak import BleakScanner
         
-        for dev in devices:
-            if dev.name and name_filter.lower() in dev.name.lower():
-                results.append({
-                    "name": dev.name,
-                    "address": dev.address,
-                    "rssi": getattr(dev, "rssi", None)
-                })
+        name_filter = name_filter.lower()
+        found: Dict[str, Dict] = {}
+        matched = asyncio.Event()
+        
+        def on_detect(dev, adv):
+            name = dev.name or adv.local_name
+            if not name or name_filter not in name.lower():
+                return
+            found[dev.address] = {
+                "name": name,
+                "address": dev.address,
+                "rssi": adv.rssi,
+            }
+            if stop_on_first:
+                matched.set()
+        
+        async with BleakScanner(detection_callback=on_detect):
+            try:
+                await asyncio.wait_for(matched.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
         
-        return results
+        return list(found.values())
     
     @staticmethod
-    def scan(name_filter: str = "B1", timeout: float = 10.0) -> List[Dict]:
+    def scan(name_filter: str = "B1", timeout: float = 10.0,
+             stop_on_first: bool = True) -> List[Dict]:
         """Synchronous scan for Niimbot devices."""
         import concurrent.futures
         
@@ -473,7 +679,9 @@ class NiimbotScanner:
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             try:
-                return loop.run_until_complete(NiimbotScanner.scan_async(name_filter, timeout))
+                return loop.run_until_complete(
+                    NiimbotScanner.scan_async(name_filter, timeout, stop_on_first)
+                )
             finally:
                 loop.close()
         
@@ -486,31 +694,110 @@ class NiimbotScanner:
 # Convenience Functions
 # =============================================================================
 
-def svg_to_image(svg_content: str, dpi: int = 203) -> Image.Image:
-    """
-    Convert SVG content to PIL Image suitable for thermal printing.
+@lru_cache(maxsize=1)
+def _resvg():
+    """The optional resvg_py module (native SVG rasterizer), or None if not installed."""
+    try:
+        import resvg_py
+    except ImportError:
+        return None
+    return resvg_py
+
+
+def _svg_to_png(svg_content: str, dpi: int, output_width: Optional[int]) -> bytes:
+    """Rasterize SVG to PNG bytes with resvg if available, else cairosvg."""
+    resvg = _resvg()
+    if resvg is not None:
+        return bytes(resvg.svg_to_bytes(
+            svg_string=svg_content,
+            width=output_width,
+            dpi=dpi,
+            background="white",
+        ))
     
-    Niimbot B1 has 203 DPI (8 dots/mm).
-    50x30mm label = 400x240 pixels
-    """
     import cairosvg
     
-    # Render SVG to PNG bytes
-    png_data = cairosvg.svg2png(
+    return cairosvg.svg2png(
         bytestring=svg_content.encode('utf-8'),
         dpi=dpi,
+        output_width=output_width,
         background_color="white"
     )
+
+
+def svg_to_image(svg_content: str, dpi: int = 203,
+                 output_width: Optional[int] = None) -> Image.Image:
+    """
+    Convert SVG content to a grayscale PIL Image suitable for thermal printing.
+    
+    Niimbot B1 has 203 DPI (8 dots/mm).
+    50x30mm label = 400x240 pixels
+    
+    If output_width is given, the SVG is rasterized straight to that many
+    pixels wide (height keeps the aspect ratio) instead of at dpi.
+    Uses resvg (resvg-py) when installed, CairoSVG otherwise.
+    """
+    # Render SVG to PNG bytes
+    png_data = _svg_to_png(svg_content, dpi, output_width)
     
     # Load as PIL Image
     img = Image.open(BytesIO(png_data))
     
-    # Convert to RGB then to 1-bit
-    img = img.convert("RGB")
+    # Straight to grayscale: the background is opaque white, so alpha can be
+    # dropped, and resize/threshold then work on one channel instead of three
+    img = img.convert("L")
     
     return img
 
 
+# Root <svg width="..mm"> of the generated labels
+_SVG_WIDTH_MM_RE = re.compile(r'<svg\b[^>]*?\swidth="([\d.]+)mm"')
+
+
+def _svg_width_px(svg_content: str, dpi: int) -> Optional[float]:
+    """Rendered width of an SVG at dpi, or None if its width is not given in mm."""
+    match = _SVG_WIDTH_MM_RE.search(svg_content)
+    if not match:
+        return None
+    return float(match.group(1)) * dpi / 25.4
+
+
+def render_label_image(svg_content: str, dpi: int = 203, max_width: int = 384) -> Image.Image:
+    """
+    Rasterize an SVG label and scale it down to fit the printhead.
+    
+    Labels wider than the printhead are rasterized directly at max_width,
+    so the vector renderer does the scaling and no raster resize is
+    needed; the resize remains as a fallback for SVGs without a width in mm.
+    """
+    width_px = _svg_width_px(svg_content, dpi)
+    if width_px is not None and width_px > max_width:
+        return svg_to_image(svg_content, dpi, output_width=max_width)
+    image = svg_to_image(svg_content, dpi)
+    if image.width > max_width:
+        ratio = max_width / image.width
+        new_height = int(image.height * ratio)
+        # reducing_gap lets Pillow box-reduce first on large downscales
+        image = image.resize((max_width, new_height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+    return image
+
+
+@lru_cache(maxsize=256)
+def render_label_packets(svg_content: str, dpi: int = 203, max_width: int = 384,
+                         threshold: int = PRINT_THRESHOLD) -> tuple[tuple[bytes, ...], int, int]:
+    """
+    Rasterize an SVG label and encode it into framed row packets for a
+    printhead max_width dots wide, see NiimbotPrinter.print_packed().
+    
+    Returns (packets, width, height). Results are cached per (svg_content,
+    dpi, max_width, threshold) so a reprint skips rasterizing, thresholding
+    and packing. Only the packed rows are kept, not the image, which is
+    several times larger.
+    """
+    image = render_label_image(svg_content, dpi, max_width)
+    return tuple(_encode_rows(image, max_width, threshold)), image.width, image.height
+
+
 def print_label_to_niimbot(address: str, svg_content: str, density: int = 3,
                            model: str = "b1", dpi: int = 203) -> bool:
     """
@@ -533,16 +820,10 @@ def print_label_to_niimbot(address: str, svg_content: str, density: int = 3,
             return False
         
         printer = NiimbotPrinter(transport, model)
-        image = svg_to_image(svg_content, dpi)
-        
-        # Resize if needed for printhead
         max_width = NiimbotPrinter.MODEL_SPECS.get(model.lower(), 384)
-        if image.width > max_width:
-            ratio = max_width / image.width
-            new_height = int(image.height * ratio)
-            image = image.resize((max_width, new_height), Image.Resampling.LANCZOS)
+        packets, width, height = render_label_packets(svg_content, dpi, max_width)
         
-        printer.print_image(image, density=density)
+        printer.print_packed(packets, width, height, density=density)
         return True
         
     finally:
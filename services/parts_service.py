@@ -9,38 +9,141 @@ the caller to batch multiple operations in one transaction.
 from __future__ import annotations
 
 import json
-import re
-from sqlalchemy.orm import Session
+from collections.abc import Mapping
+from functools import lru_cache
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session, lazyload, selectinload
 
 from db.models import Part, PartField
 from schema.numbering import build_dmtuid
 from schema.templates import get_fields
 from import_engine.field_map import DIRECT_FIELDS, SKIP_FOR_EAV
+from services.search_service import update_search_columns
 from services.sequence_service import next_xxx
 
 
+# Direct (column, attribute) pairs; Distributor is collected from the form separately
+_DIRECT_ITEMS = tuple(
+    (csv_col, attr) for csv_col, attr in DIRECT_FIELDS.items() if csv_col != "Distributor"
+)
+
+# Distributor form keys: dist_name_0, dist_url_0, ...
+_DIST_KEY_PREFIXES = ("dist_name_", "dist_url_")
+
+# Shared encoder: json.dumps() with non-default options builds a new
+# JSONEncoder on every call
+_json_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+# Loader options for views that only need the EAV fields; pricing and
+# images default to selectin loading (one extra query each)
+_FIELDS_ONLY = (
+    selectinload(Part.fields),
+    lazyload(Part.pricing),
+    lazyload(Part.images),
+)
+
+# get_many_with_fields() streams parts in batches of this size, each with
+# its own selectin load of EAV fields, instead of buffering the whole result
+_MANY_FETCH_SIZE = 500
+
+# KiCad reference fields stored directly on Part
+_KICAD_FIELDS = ("kicad_symbol", "kicad_footprint", "kicad_libref", "kicad_3dmodel")
+
+# Keys never stored as EAV or in extra_json
+_EAV_SKIP = SKIP_FOR_EAV | frozenset(_KICAD_FIELDS) | frozenset({
+    "dmtuid", "notes", "eol", "tt", "ff", "cc", "ss", "xxx", "distributor_count",
+    "staging_session_id",
+})
+
+
+@lru_cache(maxsize=256)
+def _allowed_fields(tt: str, ff: str) -> frozenset[str] | None:
+    """
+    Template fields stored as EAV for TT+FF, or None if there is no template.
+
+    Templates are loaded once at startup (schema.loader.load), so the
+    result can be cached per family.
+    """
+    template = get_fields(tt, ff)
+    if not template:
+        return None
+    return frozenset(template) - _EAV_SKIP
+
+
+def _uid_segments(data: Mapping) -> tuple[str, str, str, str]:
+    """Zero-padded (tt, ff, cc, ss) from form/API data."""
+    return tuple(str(data.get(k, "")).zfill(2) for k in ("tt", "ff", "cc", "ss"))
+
+
+def _clean_data(data: Mapping) -> dict[str, str]:
+    """Stringify and strip every value once; None becomes an empty string."""
+    return {k: "" if v is None else str(v).strip() for k, v in data.items()}
+
+
+def _split_fields(clean: dict[str, str],
+                  allowed: frozenset[str] | None) -> tuple[dict[str, str], dict[str, str]]:
+    """
+    Classify cleaned keys in one pass into (eav, extra).
+
+    Template fields go to eav, anything else that is not a direct/KiCad/
+    UID key or a distributor form field goes to extra (extra_json).
+    Empty values are kept so update() can clear fields.
+    """
+    eav: dict[str, str] = {}
+    extra: dict[str, str] = {}
+    template = allowed or frozenset()
+    for k, val in clean.items():
+        if k in template:
+            eav[k] = val
+        elif k not in _EAV_SKIP and not k.startswith(_DIST_KEY_PREFIXES):
+            extra[k] = val
+    return eav, extra
+
+
+def _insert_fields(session: Session, parts: list[Part], field_rows: list[dict]) -> None:
+    """
+    Insert EAV rows for freshly flushed parts in one executemany.
+
+    The parts' ``fields`` collections are expired so they reload with
+    the new rows on next access.
+    """
+    if not field_rows:
+        return
+    session.execute(insert(PartField), field_rows)
+    for part in parts:
+        session.expire(part, ["fields"])
+
+
 def collect_distributors_from_form(data: dict) -> str:
     """
     Collect distributor fields from form data.
     Form fields are named: dist_name_0, dist_url_0, dist_name_1, dist_url_1, etc.
     Returns JSON string or empty string if no distributors.
     """
-    distributors = []
-    # Find all dist_name_* and dist_url_* fields
-    indices = set()
-    for key in data.keys():
-        match = re.match(r'dist_(name|url)_(\d+)', key)
-        if match:
-            indices.add(int(match.group(2)))
-    
-    for idx in sorted(indices):
-        name = data.get(f'dist_name_{idx}', '').strip()
-        url = data.get(f'dist_url_{idx}', '').strip()
-        if url:  # URL is required, name is optional
-            distributors.append({'name': name, 'url': url})
+    # One pass over the form: {index: {"name": ..., "url": ...}}
+    rows: dict[int, dict[str, str]] = {}
+    for key, val in data.items():
+        # Cheap literal check first; almost all form keys are not distributor fields
+        if not key.startswith("dist_"):
+            continue
+        if key.startswith("dist_name_"):
+            kind, idx = "name", key[10:]
+        elif key.startswith("dist_url_"):
+            kind, idx = "url", key[9:]
+        else:
+            continue
+        if idx.isdecimal():
+            rows.setdefault(int(idx), {})[kind] = val.strip()
+
+    distributors = [
+        {'name': row.get('name', ''), 'url': row['url']}
+        for _, row in sorted(rows.items())
+        if row.get('url')  # URL is required, name is optional
+    ]
     
     if distributors:
-        return json.dumps(distributors, ensure_ascii=False)
+        return _json_encode(distributors)
     return ""
 
 
@@ -49,40 +152,52 @@ class PartsService:
     # ── Create ─────────────────────────────────────────────────────────
 
     @staticmethod
-    def create(session: Session, data: dict) -> Part:
+    def create(session: Session, data: Mapping) -> Part:
         """
         Create a new Part from a dict of field values.
         Required keys: tt, ff, cc, ss.  XXX is auto-assigned.
         """
-        tt = str(data.get("tt", "")).zfill(2)
-        ff = str(data.get("ff", "")).zfill(2)
-        cc = str(data.get("cc", "")).zfill(2)
-        ss = str(data.get("ss", "")).zfill(2)
-
+        tt, ff, cc, ss = _uid_segments(data)
         xxx = next_xxx(session, tt, ff, cc, ss)
+        part, field_rows = PartsService._build_part(data, tt, ff, cc, ss, xxx)
+
+        session.add(part)
+        session.flush()
+        _insert_fields(session, [part], field_rows)
+        return part
+
+    @staticmethod
+    def _build_part(data: Mapping, tt: str, ff: str, cc: str, ss: str,
+                    xxx: str) -> tuple[Part, list[dict]]:
+        """
+        Build an unsaved Part (with extra_json) from form/API data.
+
+        Returns (part, field_rows) where field_rows are the template EAV
+        values as PartField insert parameters, see _insert_fields().
+        """
+        clean = _clean_data(data)
         dmtuid = build_dmtuid(tt, ff, cc, ss, xxx)
 
         part = Part(dmtuid=dmtuid, tt=tt, ff=ff, cc=cc, ss=ss, xxx=xxx)
 
         # Direct fields (excluding Distributor - handled separately)
-        for csv_col, attr in DIRECT_FIELDS.items():
-            if csv_col == "Distributor":
-                continue  # Handled below
-            val = str(data.get(csv_col, data.get(attr, ""))).strip()
+        for csv_col, attr in _DIRECT_ITEMS:
+            val = clean.get(csv_col, clean.get(attr, ""))
             if val:
                 setattr(part, attr, val)
+        update_search_columns(part)
 
         # Collect distributors from form fields (dist_name_*, dist_url_*)
-        part.distributor = collect_distributors_from_form(data)
+        part.distributor = collect_distributors_from_form(clean)
 
         # KiCad fields
-        for kf in ("kicad_symbol", "kicad_footprint", "kicad_libref", "kicad_3dmodel"):
-            val = str(data.get(kf, "")).strip()
+        for kf in _KICAD_FIELDS:
+            val = clean.get(kf, "")
             if val:
                 setattr(part, kf, val)
 
         # Notes
-        part.notes = str(data.get("notes", "")).strip()
+        part.notes = clean.get("notes", "")
 
         # EOL flag
         if "eol" in data:
@@ -90,46 +205,17 @@ class PartsService:
             part.eol = val in (True, "true", "on", "1", 1)
 
         # Template EAV fields + extra_json for non-template fields
-        template = get_fields(tt, ff)
-        skip = SKIP_FOR_EAV | {"kicad_symbol", "kicad_footprint",
-                                "kicad_libref", "kicad_3dmodel", "dmtuid", "notes", "eol",
-                                "tt", "ff", "cc", "ss", "xxx", "distributor_count"}
-        # Also skip distributor form fields
-        skip_patterns = {'dist_name_', 'dist_url_'}
-        
-        extra: dict[str, str] = {}
-        if template:
-            allowed = set(template) - skip
-            for k, v in data.items():
-                # Skip distributor form fields
-                if any(k.startswith(p) for p in skip_patterns):
-                    continue
-                val = str(v).strip()
-                if not val:
-                    continue
-                if k in allowed:
-                    part.fields.append(
-                        PartField(field_name=k, field_value=val)
-                    )
-                elif k not in skip:
-                    # Non-template field → extra_json
-                    extra[k] = val
-        else:
-            # No template → all non-skip fields go to extra_json
-            for k, v in data.items():
-                # Skip distributor form fields
-                if any(k.startswith(p) for p in skip_patterns):
-                    continue
-                val = str(v).strip()
-                if val and k not in skip:
-                    extra[k] = val
+        eav, extra = _split_fields(clean, _allowed_fields(tt, ff))
+        field_rows = [
+            {"dmtuid": dmtuid, "field_name": k, "field_value": val}
+            for k, val in eav.items() if val
+        ]
+        extra = {k: val for k, val in extra.items() if val}
 
         if extra:
-            part.extra_json = json.dumps(extra, ensure_ascii=False)
+            part.extra_json = _json_encode(extra)
 
-        session.add(part)
-        session.flush()
-        return part
+        return part, field_rows
 
     # ── Read ───────────────────────────────────────────────────────────
 
@@ -137,34 +223,64 @@ class PartsService:
     def get(session: Session, dmtuid: str) -> Part | None:
         return session.get(Part, dmtuid.upper())
 
+    @staticmethod
+    def get_with_fields(session: Session, dmtuid: str) -> Part | None:
+        """
+        Like get(), but loads only the EAV fields (one IN-batched SELECT)
+        and leaves pricing/images lazy.  For edit forms, labels and other
+        views that never touch supply-chain data or images.
+        """
+        return session.get(Part, dmtuid.upper(), options=_FIELDS_ONLY)
+
+    @staticmethod
+    def get_many_with_fields(session: Session, dmtuids: list[str]) -> dict[str, Part]:
+        """
+        get_with_fields() for many parts in one IN query, plus one SELECT
+        for all their EAV fields.  Returns {dmtuid: part}; unknown DMTUIDs
+        are left out.
+        """
+        uids = {uid.upper() for uid in dmtuids}
+        if not uids:
+            return {}
+        parts = session.scalars(
+            select(Part).where(Part.dmtuid.in_(uids)).options(*_FIELDS_ONLY),
+            execution_options={"yield_per": _MANY_FETCH_SIZE},
+        )
+        return {part.dmtuid: part for part in parts}
+
     # ── Update ─────────────────────────────────────────────────────────
 
     @staticmethod
-    def update(session: Session, part: Part, data: dict) -> Part:
+    def update(session: Session, part: Part, data: Mapping) -> Part:
         """
         Update direct, KiCad, notes, and EAV fields on an existing Part.
         """
+        clean = _clean_data(data)
+
         # Direct fields (excluding Distributor - handled separately)
-        for csv_col, attr in DIRECT_FIELDS.items():
-            if csv_col == "Distributor":
-                continue  # Handled below
-            if csv_col in data or attr in data:
-                val = str(data.get(csv_col, data.get(attr, ""))).strip()
-                setattr(part, attr, val)
+        direct_changed = False
+        for csv_col, attr in _DIRECT_ITEMS:
+            if csv_col in clean or attr in clean:
+                val = clean.get(csv_col, clean.get(attr, ""))
+                if getattr(part, attr) != val:
+                    setattr(part, attr, val)
+                    direct_changed = True
+        if direct_changed:
+            update_search_columns(part)
 
         # Collect distributors from form fields (dist_name_*, dist_url_*)
         # Only update if distributor form fields are present
-        if any(k.startswith('dist_name_') or k.startswith('dist_url_') for k in data.keys()):
-            part.distributor = collect_distributors_from_form(data)
+        if any(k.startswith(_DIST_KEY_PREFIXES) for k in clean):
+            part.distributor = collect_distributors_from_form(clean)
 
         # KiCad
-        for kf in ("kicad_symbol", "kicad_footprint", "kicad_libref", "kicad_3dmodel"):
-            if kf in data:
-                setattr(part, kf, str(data[kf]).strip())
+        for kf in _KICAD_FIELDS:
+            if kf in clean:
+                setattr(part, kf, clean[kf])
 
         # Notes
-        if "notes" in data:
-            part.notes = str(data["notes"]).strip()
+        if "notes" in clean:
+            part.notes = clean["notes"]
 
         # EOL flag
         if "eol" in data:
@@ -172,12 +288,7 @@ class PartsService:
             part.eol = val in (True, "true", "on", "1", 1)
 
         # EAV fields + extra_json for non-template fields
-        template = get_fields(part.tt, part.ff)
-        skip = SKIP_FOR_EAV | {"kicad_symbol", "kicad_footprint",
-                                "kicad_libref", "kicad_3dmodel", "dmtuid", "notes", "eol",
-                                "tt", "ff", "cc", "ss", "xxx", "distributor_count"}
-        # Also skip distributor form fields
-        skip_patterns = {'dist_name_', 'dist_url_'}
+        eav, extra = _split_fields(clean, _allowed_fields(part.tt, part.ff))
 
         # Load existing extra_json
         existing_extra: dict[str, str] = {}
@@ -186,48 +297,47 @@ class PartsService:
                 existing_extra = json.loads(part.extra_json)
             except (json.JSONDecodeError, TypeError):
                 pass
+        original_extra = dict(existing_extra)
 
-        if template:
-            allowed = set(template) - skip
-            existing_map = {f.field_name: f for f in part.fields}
-            for k, v in data.items():
-                # Skip distributor form fields
-                if any(k.startswith(p) for p in skip_patterns):
-                    continue
-                val = str(v).strip()
-                if k in allowed:
-                    # Template field → EAV
-                    if k in existing_map:
-                        if val:
-                            existing_map[k].field_value = val
-                        else:
-                            session.delete(existing_map[k])
-                    elif val:
-                        part.fields.append(
-                            PartField(field_name=k, field_value=val)
-                        )
-                elif k not in skip:
-                    # Non-template field → extra_json
-                    if val:
-                        existing_extra[k] = val
-                    elif k in existing_extra:
-                        del existing_extra[k]
-        else:
-            # No template → all non-skip fields go to extra_json
-            for k, v in data.items():
-                # Skip distributor form fields
-                if any(k.startswith(p) for p in skip_patterns):
-                    continue
-                val = str(v).strip()
-                if k in skip:
-                    continue
+        for k, val in extra.items():
+            if val:
+                existing_extra[k] = val
+            elif k in existing_extra:
+                del existing_extra[k]
+
+        if eav:
+            # Diff against the loaded EAV rows; changes are applied as one
+            # DELETE and one INSERT regardless of how many fields changed
+            existing_values = {f.field_name: f.field_value for f in part.fields}
+            stale_names: list[str] = []
+            new_rows: list[dict] = []
+            for k, val in eav.items():
+                if k in existing_values:
+                    if val == existing_values[k]:
+                        continue
+                    stale_names.append(k)
                 if val:
-                    existing_extra[k] = val
-                elif k in existing_extra:
-                    del existing_extra[k]
+                    new_rows.append(
+                        {"dmtuid": part.dmtuid, "field_name": k, "field_value": val}
+                    )
 
-        # Update extra_json
-        part.extra_json = json.dumps(existing_extra, ensure_ascii=False) if existing_extra else None
+            if stale_names:
+                session.execute(
+                    delete(PartField).where(
+                        PartField.dmtuid == part.dmtuid,
+                        PartField.field_name.in_(stale_names),
+                    )
+                )
+            if new_rows:
+                session.execute(insert(PartField), new_rows)
+            if stale_names or new_rows:
+                session.expire(part, ["fields"])
+
+        # Update extra_json; unchanged contents are not re-encoded
+        if not existing_extra:
+            part.extra_json = None
+        elif existing_extra != original_extra:
+            part.extra_json = _json_encode(existing_extra)
 
         session.flush()
         return part
@@ -2,17 +2,39 @@
 services.search_service - Text search and filtered listing.
 
 Builds SQLAlchemy queries with optional filters and full-text-like
-ILIKE matching across indexed columns.
+substring matching across indexed columns (SQLite FTS5 trigram index
+when available, otherwise LIKE on the lower-cased Part.search_blob).
 """
 
 from __future__ import annotations
-import re
 
-from sqlalchemy.orm import Session, Query
+import json
+import threading
+import time
+from collections.abc import Callable
+from functools import lru_cache
 
+from sqlalchemy import exists, func, or_, text
+from sqlalchemy.orm import Session, Query, lazyload, selectinload
+
+from db.engine import TEXT_SEARCH_COLUMNS, has_text_index
 from db.models import Part, PartField
 
 
+# Substring match on any text search column via the FTS5 trigram index
+_TEXT_INDEX_MATCH = text(
+    "parts.rowid IN (SELECT rowid FROM parts_fts WHERE parts_fts MATCH :phrase)"
+)
+
+# Property-filter names served by Part columns instead of the EAV table
+_PROP_DIRECT_COLUMNS = {
+    "MPN": Part.mpn,
+    "Value": Part.value,
+    "Manufacturer": Part.manufacturer,
+    "Location": Part.location,
+    "Description": Part.description,
+}
+
 # Metric prefix multipliers for smart value sorting
 VALUE_PREFIXES = {
     'p': 1e-12,   # pico
@@ -28,60 +50,149 @@ VALUE_PREFIXES = {
 }
 
 
+def _scan_digits(s: str, i: int, dots: bool) -> int:
+    """Index just past the run of decimal digits (and dots if allowed) at s[i:]."""
+    n = len(s)
+    while i < n and (s[i].isdecimal() or (dots and s[i] == '.')):
+        i += 1
+    return i
+
+
 def parse_value_sortkey(value_str: str) -> float:
     """
     Parse a component value string and return a numeric sort key.
     Handles: 100pF, 10nF, 4.7uF, 10R, 4K7, 1M, 10K, "3.3R 1%", "10R 5% 2W", etc.
     """
-    if not value_str:
-        return float('inf')  # Empty values sort last
-    
-    value_str = value_str.strip()
-    
     # Strip trailing specs like "1%", "5% 2W", voltage ratings, etc.
     # Keep only the value part (number + prefix + optional decimal)
-    value_str = re.split(r'\s+', value_str)[0]  # Take only first word
-    
-    # Try pattern: number + prefix + optional decimal (e.g., "4K7" = 4.7K)
+    words = value_str.split(None, 1) if value_str else None
+    if not words:
+        return float('inf')  # Empty values sort last
+    word = words[0]
+
+    # Leading number (digits and dots), e.g. "4.7" in "4.7uF"
+    end = _scan_digits(word, 0, dots=True)
+    if not end:
+        return float('inf')
+    num_part = word[:end]
+
+    # Number + prefix + optional decimal (e.g., "4K7" = 4.7K)
     # Handles: 100nF, 4.7uF, 10R, 4K7, 1.8K, 0.1R, etc.
-    match = re.match(r'^([\d.]+)([pnuµmRKkMG])(\d*)', value_str)
-    if match:
-        num_part = match.group(1)
-        prefix = match.group(2)
-        decimal_part = match.group(3)
-        
+    multiplier = VALUE_PREFIXES.get(word[end]) if end < len(word) else None
+    if multiplier is not None:
+        decimal_part = word[end + 1:_scan_digits(word, end + 1, dots=False)]
         try:
             num = float(num_part)
-            # Handle "4K7" format -> 4.7K
             if decimal_part:
                 num = float(f"{num_part}.{decimal_part}")
-            
-            # Get multiplier - handle case sensitivity
-            # R = ohm (1), K/k = kilo, M = mega, m = milli
-            if prefix in ('K', 'k'):
-                multiplier = 1e3
-            elif prefix == 'M':
-                multiplier = 1e6
-            elif prefix == 'm':
-                multiplier = 1e-3
-            elif prefix == 'R':
-                multiplier = 1  # Ohm
-            else:
-                multiplier = VALUE_PREFIXES.get(prefix, 1)
-            
             return num * multiplier
         except ValueError:
             pass
-    
-    # Try simple number (no prefix)
+
+    # Simple number (no prefix)
     try:
-        num_match = re.match(r'^([\d.]+)', value_str)
-        if num_match:
-            return float(num_match.group(1))
+        return float(num_part)
     except ValueError:
-        pass
-    
-    return float('inf')
+        return float('inf')
+
+
+def value_sort_number(value_str: str | None) -> float | None:
+    """
+    Numeric sort key for storing in Part.value_numeric.
+    Unparseable or empty values map to NULL (sorted after all numbers).
+    """
+    key = parse_value_sortkey(value_str or "")
+    return None if key == float('inf') else key
+
+
+# Joins the columns in search_blob; cannot occur in a typed query, so a
+# match never spans two columns
+_BLOB_SEP = "\x1f"
+
+
+def search_blob(*values: str | None) -> str:
+    """Lower-cased text search columns joined into one string (Part.search_blob)."""
+    return _BLOB_SEP.join(v for v in values if v).lower()
+
+
+def update_search_columns(part: Part) -> None:
+    """Refresh Part.value_numeric and Part.search_blob after direct fields change."""
+    part.value_numeric = value_sort_number(part.value)
+    part.search_blob = search_blob(*(getattr(part, c) for c in TEXT_SEARCH_COLUMNS))
+
+
+@lru_cache(maxsize=256)
+def parse_prop_filters(raw: str) -> dict:
+    """
+    Property filters from the JSON ``props`` query parameter.
+
+    Malformed JSON or anything other than an object gives no filters.
+    Results are cached per string, since paging through a filtered list
+    repeats the same props; callers must not modify the returned dict.
+    """
+    if not raw:
+        return {}
+    try:
+        props = json.loads(raw)
+    except json.JSONDecodeError:
+        return {}
+    return props if isinstance(props, dict) else {}
+
+
+def _list_loader_options(eager_fields: bool):
+    """
+    Loader options for list queries.  Part's relationships default to
+    selectin loading, which costs one extra query per relationship for
+    every page even when the caller never touches them.
+    """
+    return (
+        selectinload(Part.fields) if eager_fields else lazyload(Part.fields),
+        lazyload(Part.pricing),
+        lazyload(Part.images),
+    )
+
+
+# Computed facets are reused for FACET_CACHE_TTL seconds per (tt, ff, cc, ss).
+# Code that writes parts calls invalidate_facets() after committing; the
+# TTL bounds staleness for any other writer.
+FACET_CACHE_TTL = 60
+FACET_CACHE_SIZE = 512
+_facet_cache: dict[tuple[str, str, str, str], tuple[float, dict]] = {}
+_facet_cache_lock = threading.Lock()
+_facet_generation = 0
+
+
+def invalidate_facets() -> None:
+    """Drop all cached facets; call after committing changes to parts."""
+    global _facet_generation
+    with _facet_cache_lock:
+        _facet_cache.clear()
+        _facet_generation += 1
+
+
+def cached_facets(key: tuple[str, str, str, str],
+                  compute: Callable[[], dict]) -> dict:
+    """Facets for a (tt, ff, cc, ss) key, calling compute() on a miss."""
+    now = time.monotonic()
+    with _facet_cache_lock:
+        entry = _facet_cache.get(key)
+        if entry and entry[0] > now:
+            return entry[1]
+        generation = _facet_generation
+
+    data = compute()
+
+    with _facet_cache_lock:
+        # Not stored if parts were written while computing
+        if generation == _facet_generation:
+            _facet_cache.pop(key, None)
+            if len(_facet_cache) >= FACET_CACHE_SIZE:
+                for k in [k for k, (expires, _) in _facet_cache.items() if expires <= now]:
+                    del _facet_cache[k]
+                if len(_facet_cache) >= FACET_CACHE_SIZE:
+                    del _facet_cache[next(iter(_facet_cache))]   # oldest entry
+            _facet_cache[key] = (now + FACET_CACHE_TTL, data)
+    return data
 
 
 class SearchService:
@@ -90,7 +201,7 @@ class SearchService:
     SORTABLE_COLUMNS = {
         "dmtuid": Part.dmtuid,
         "mpn": Part.mpn,
-        "value": Part.value,
+        "value": Part.value_numeric,   # metric-prefix aware, see parse_value_sortkey
         "quantity": Part.quantity,
         "location": Part.location,
         "manufacturer": Part.manufacturer,
@@ -98,6 +209,14 @@ class SearchService:
         "created_at": Part.created_at,
     }
 
+    # Columns returned by quick_search_rows() for the live-search dropdown;
+    # the description is cut to its first 80 characters in SQL
+    DROPDOWN_COLUMNS = (
+        Part.dmtuid, Part.mpn, Part.value, Part.manufacturer,
+        func.substr(Part.description, 1, 80).label("description"),
+        Part.quantity, Part.datasheet,
+    )
+
     @staticmethod
     def search(
         session: Session,
@@ -112,32 +231,46 @@ class SearchService:
         sort_order: str = "asc",
         limit: int = 100,
         offset: int = 0,
-    ) -> tuple[list[Part], int]:
+        count_total: bool = True,
+        eager_fields: bool = True,
+    ) -> tuple[list[Part], int | None]:
         """
         Search parts.  Returns (parts_list, total_count).
+
+        The total comes from a COUNT(*) OVER () window column on the page
+        query, so filters are evaluated once.  With count_total=False no
+        total is computed and None is returned in its place.
+
+        Only Part.fields is eager-loaded (one IN query for the page), and
+        only when eager_fields is set; pricing and images load lazily on
+        access.  Sorting by
+        "value" uses the precomputed Part.value_numeric column, so it is
+        paginated in SQL as well.
         """
-        query = session.query(Part)
+        query = session.query(Part).options(*_list_loader_options(eager_fields))
         query = SearchService._apply_filters(query, q=q, tt=tt, ff=ff, cc=cc, ss=ss, props=props)
-        total = query.count()
-        
-        # Special handling for "value" column - needs smart metric prefix sorting
-        if sort_by == "value":
-            # Fetch all matching parts and sort in Python
-            all_parts = query.all()
-            reverse = (sort_order == "desc")
-            all_parts.sort(key=lambda p: parse_value_sortkey(p.value or ""), reverse=reverse)
-            # Apply pagination
-            parts = all_parts[offset:offset + limit]
+
+        sort_col = SearchService.SORTABLE_COLUMNS.get(sort_by, Part.dmtuid)
+        if sort_order == "desc":
+            order = sort_col.desc()
         else:
-            # Standard SQL sorting for other columns
-            sort_col = SearchService.SORTABLE_COLUMNS.get(sort_by, Part.dmtuid)
-            if sort_order == "desc":
-                query = query.order_by(sort_col.desc())
-            else:
-                query = query.order_by(sort_col.asc())
-            parts = query.offset(offset).limit(limit).all()
-        
-        return parts, total
+            order = sort_col.asc()
+        if sort_col is Part.value_numeric:
+            # Values without a number sort last ascending, first descending
+            order = order.nulls_first() if sort_order == "desc" else order.nulls_last()
+        query = query.order_by(order)
+        if sort_col is not Part.dmtuid:
+            # Unique tie-breaker so pages are stable when sort values repeat
+            query = query.order_by(Part.dmtuid.asc())
+
+        if not count_total:
+            return query.offset(offset).limit(limit).all(), None
+
+        rows = query.add_columns(func.count().over()).offset(offset).limit(limit).all()
+        if rows:
+            return [part for part, _ in rows], rows[0][1]
+        # Empty page: either no matches or offset past the end
+        return [], (query.order_by(None).count() if offset else 0)
 
     @staticmethod
     def quick_search(session: Session, q: str, limit: int = 20) -> list[Part]:
@@ -147,7 +280,21 @@ class SearchService:
         """
         if not q:
             return []
-        query = session.query(Part)
+        query = session.query(Part).options(*_list_loader_options(eager_fields=False))
+        query = SearchService._apply_text_filter(query, q)
+        return query.order_by(Part.dmtuid).limit(limit).all()
+
+    @staticmethod
+    def quick_search_rows(session: Session, q: str, limit: int = 20) -> list:
+        """
+        quick_search() returning plain rows of DROPDOWN_COLUMNS.
+
+        For read-only JSON callers: rows skip ORM instance construction
+        and identity-map bookkeeping.
+        """
+        if not q:
+            return []
+        query = session.query(*SearchService.DROPDOWN_COLUMNS)
         query = SearchService._apply_text_filter(query, q)
         return query.order_by(Part.dmtuid).limit(limit).all()
 
@@ -172,14 +319,22 @@ class SearchService:
     @staticmethod
     def _apply_text_filter(query: Query, q: str) -> Query:
         like = f"%{q}%"
-        return query.filter(
-            Part.dmtuid.ilike(like)
-            | Part.mpn.ilike(like)
-            | Part.value.ilike(like)
-            | Part.description.ilike(like)
-            | Part.manufacturer.ilike(like)
-            | Part.location.ilike(like)
-        )
+        if "%" in q or "_" in q:
+            # LIKE wildcards in q keep their meaning, so match each column
+            # separately rather than letting a wildcard span two columns
+            return query.filter(
+                Part.dmtuid.ilike(like)
+                | Part.mpn.ilike(like)
+                | Part.value.ilike(like)
+                | Part.description.ilike(like)
+                | Part.manufacturer.ilike(like)
+                | Part.location.ilike(like)
+            )
+        if len(q) >= 3 and has_text_index():
+            # The trigram index needs at least 3 characters
+            phrase = '"' + q.replace('"', '""') + '"'
+            return query.filter(_TEXT_INDEX_MATCH.bindparams(phrase=phrase))
+        return query.filter(Part.search_blob.like(like.lower()))
 
     @staticmethod
     def _apply_prop_filters(query: Query, props: dict) -> Query:
@@ -190,57 +345,54 @@ class SearchService:
         Or legacy: {field_name: "search_value"} for ILIKE matching
         
         For direct columns (MPN, Value, etc.), filter on Part directly.
-        For EAV fields, filter via PartField subqueries.
+        For EAV fields, filter via correlated EXISTS on PartField.
         """
-        from sqlalchemy import or_
-        
-        direct_cols = {
-            "MPN": Part.mpn,
-            "Value": Part.value,
-            "Manufacturer": Part.manufacturer,
-            "Location": Part.location,
-            "Description": Part.description,
-        }
-
+        # Sort props into the four kinds of filter in one pass
+        direct_in, direct_like, eav_in, eav_like = [], [], [], []
         for field_name, search_values in props.items():
             if not search_values:
                 continue
-
-            # Handle both list (multi-select) and string (legacy ILIKE)
+            col = _PROP_DIRECT_COLUMNS.get(field_name)
+            # Both list (multi-select) and string (legacy ILIKE) are accepted
             if isinstance(search_values, list):
-                # Multi-select: exact match, OR between values
-                if field_name in direct_cols:
-                    col = direct_cols[field_name]
-                    # Special handling for "(Empty)" values
-                    if "(Empty)" in search_values:
-                        other_values = [v for v in search_values if v != "(Empty)"]
-                        if other_values:
-                            query = query.filter(or_(
-                                col.in_(other_values),
-                                col == None,
-                                col == ""
-                            ))
-                        else:
-                            query = query.filter(or_(col == None, col == ""))
-                    else:
-                        query = query.filter(col.in_(search_values))
+                if col is not None:
+                    direct_in.append((col, search_values))
                 else:
-                    # EAV field
-                    subq = query.session.query(PartField.dmtuid).filter(
-                        PartField.field_name == field_name,
-                        PartField.field_value.in_(search_values)
-                    ).subquery()
-                    query = query.filter(Part.dmtuid.in_(subq))
+                    eav_in.append((field_name, search_values))
+            elif col is not None:
+                direct_like.append((col, f"%{search_values}%"))
             else:
-                # Legacy: ILIKE search
-                like = f"%{search_values}%"
-                if field_name in direct_cols:
-                    query = query.filter(direct_cols[field_name].ilike(like))
-                else:
-                    subq = query.session.query(PartField.dmtuid).filter(
-                        PartField.field_name == field_name,
-                        PartField.field_value.ilike(like)
-                    ).subquery()
-                    query = query.filter(Part.dmtuid.in_(subq))
+                eav_like.append((field_name, f"%{search_values}%"))
 
-        return query
+        conditions = [
+            *(SearchService._direct_in(col, values) for col, values in direct_in),
+            *(col.ilike(like) for col, like in direct_like),
+            *(SearchService._eav_exists(name, PartField.field_value.in_(values))
+              for name, values in eav_in),
+            *(SearchService._eav_exists(name, PartField.field_value.ilike(like))
+              for name, like in eav_like),
+        ]
+        return query.filter(*conditions) if conditions else query
+
+    @staticmethod
+    def _direct_in(col, values: list):
+        """Multi-select on a Part column: exact match, OR between values."""
+        # Special handling for "(Empty)" values
+        if "(Empty)" not in values:
+            return col.in_(values)
+        other_values = [v for v in values if v != "(Empty)"]
+        if other_values:
+            return or_(col.in_(other_values), col == None, col == "")
+        return or_(col == None, col == "")
+
+    @staticmethod
+    def _eav_exists(field_name: str, value_cond):
+        """
+        EAV field filter as a correlated EXISTS: an ix_field_cover probe
+        per part that stops at the first matching row.
+        """
+        return exists().where(
+            PartField.dmtuid == Part.dmtuid,
+            PartField.field_name == field_name,
+            value_cond,
+        )
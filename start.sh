@@ -46,8 +46,7 @@ fi
 
 # Check if all requirements are satisfied
 if pip freeze 2>/dev/null | grep -qiF flask && \
-   pip freeze 2>/dev/null | grep -qiF sqlalchemy && \
-   pip freeze 2>/dev/null | grep -qiF kiutils; then
+   pip freeze 2>/dev/null | grep -qiF sqlalchemy; then
     echo "      All dependencies installed."
 else
     echo "      Installing/updating dependencies..."
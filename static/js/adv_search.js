@@ -98,11 +98,11 @@
             ffSelect.addEventListener("change", function () {
                 var tt = ttAdvSelect ? ttAdvSelect.value : ttSelect.value;
                 if (tt && ffSelect.value) {
-                    loadCCSS(tt, ffSelect.value);
+                    loadCCSSAndFacets(tt, ffSelect.value);
                 } else {
                     clearCCSS();
+                    loadFacets();
                 }
-                loadFacets();
             });
         }
 
@@ -139,12 +139,16 @@
         // ── Initialize on load ──────────────────────────────────────────
         if (currentFilters.tt) {
             populateFamilies(currentFilters.tt);
+            // Load facets too if panel should be open
+            var showFacets = panel && panel.classList.contains("show");
             if (currentFilters.ff) {
                 ffSelect.value = currentFilters.ff;
-                loadCCSS(currentFilters.tt, currentFilters.ff);
-            }
-            // Load facets if panel should be open
-            if (panel && panel.classList.contains("show")) {
+                if (showFacets) {
+                    loadCCSSAndFacets(currentFilters.tt, currentFilters.ff);
+                } else {
+                    loadCCSS(currentFilters.tt, currentFilters.ff);
+                }
+            } else if (showFacets) {
                 loadFacets();
             }
         }
@@ -183,41 +187,69 @@
         function loadCCSS(tt, ff) {
             fetch("/ui-api/template_fields?tt=" + tt + "&ff=" + ff)
                 .then(function (r) { return r.json(); })
-                .then(function (data) {
-                    // Populate CC
-                    if (ccSelect) {
-                        ccSelect.innerHTML = '<option value="">All Classes</option>';
-                        if (data.guidelines && data.guidelines.cc) {
-                            Object.entries(data.guidelines.cc).forEach(function (e) {
-                                var o = document.createElement("option");
-                                o.value = e[0].toString().padStart(2, "0");
-                                o.textContent = e[0].toString().padStart(2, "0") + " - " + e[1];
-                                ccSelect.appendChild(o);
-                            });
-                        }
-                        if (currentFilters.cc) ccSelect.value = currentFilters.cc;
-                    }
+                .then(renderCCSS);
+        }
 
-                    // Populate SS
-                    if (ssSelect) {
-                        ssSelect.innerHTML = '<option value="">All Styles</option>';
-                        var ssKey = null;
-                        if (data.guidelines) {
-                            ssKey = Object.keys(data.guidelines).find(function (k) { return k.startsWith("ss"); });
-                        }
-                        if (ssKey && data.guidelines[ssKey]) {
-                            Object.entries(data.guidelines[ssKey]).forEach(function (e) {
-                                var o = document.createElement("option");
-                                o.value = e[0].toString().padStart(2, "0");
-                                o.textContent = e[0].toString().padStart(2, "0") + " - " + e[1];
-                                ssSelect.appendChild(o);
-                            });
-                        }
-                        if (currentFilters.ss) ssSelect.value = currentFilters.ss;
+        // CC/SS options and facets from one /ui-api/page_bootstrap request
+        function loadCCSSAndFacets(tt, ff) {
+            var url = "/ui-api/page_bootstrap?tt=" + tt + "&ff=" + ff;
+            var cc = ccSelect ? ccSelect.value : "";
+            var ss = ssSelect ? ssSelect.value : "";
+            if (cc) url += "&cc=" + cc;
+            if (ss) url += "&ss=" + ss;
+
+            if (facetGrid) {
+                facetGrid.innerHTML = '<div class="facet-loading">Loading filters...</div>';
+            }
+
+            fetch(url)
+                .then(function (r) { return r.json(); })
+                .then(function (data) {
+                    renderCCSS(data);
+                    renderFacets(data.facets, data.total);
+                })
+                .catch(function (err) {
+                    console.error("Facets load error:", err);
+                    if (facetGrid) {
+                        facetGrid.innerHTML = '<div class="facet-loading">Error loading filters</div>';
                     }
                 });
         }
 
+        function renderCCSS(data) {
+            // Populate CC
+            if (ccSelect) {
+                ccSelect.innerHTML = '<option value="">All Classes</option>';
+                if (data.guidelines && data.guidelines.cc) {
+                    Object.entries(data.guidelines.cc).forEach(function (e) {
+                        var o = document.createElement("option");
+                        o.value = e[0].toString().padStart(2, "0");
+                        o.textContent = e[0].toString().padStart(2, "0") + " - " + e[1];
+                        ccSelect.appendChild(o);
+                    });
+                }
+                if (currentFilters.cc) ccSelect.value = currentFilters.cc;
+            }
+
+            // Populate SS
+            if (ssSelect) {
+                ssSelect.innerHTML = '<option value="">All Styles</option>';
+                var ssKey = null;
+                if (data.guidelines) {
+                    ssKey = Object.keys(data.guidelines).find(function (k) { return k.startsWith("ss"); });
+                }
+                if (ssKey && data.guidelines[ssKey]) {
+                    Object.entries(data.guidelines[ssKey]).forEach(function (e) {
+                        var o = document.createElement("option");
+                        o.value = e[0].toString().padStart(2, "0");
+                        o.textContent = e[0].toString().padStart(2, "0") + " - " + e[1];
+                        ssSelect.appendChild(o);
+                    });
+                }
+                if (currentFilters.ss) ssSelect.value = currentFilters.ss;
+            }
+        }
+
         function loadFacets() {
             var tt = ttAdvSelect ? ttAdvSelect.value : (ttSelect ? ttSelect.value : "");
             if (!tt) {
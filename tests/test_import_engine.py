@@ -0,0 +1,56 @@
+"""
+tests.test_import_engine - CSV import regression tests.
+"""
+
+import pytest
+
+import config
+from db.engine import get_session, init_db
+from db.models import Part
+from import_engine import importer
+from schema.loader import load
+
+
+@pytest.fixture(autouse=True)
+def memory_db(monkeypatch):
+    load(config.SCHEMA_PATH, config.TEMPLATES_PATH)
+    init_db("sqlite://")
+    # Small chunks so a few rows cover prefetch, mid-chunk flush and repeats
+    monkeypatch.setattr(importer, "FLUSH_BATCH_SIZE", 4)
+
+
+def _csv(*rows: str) -> bytes:
+    return "\n".join(("DMTUID,MPN",) + rows).encode()
+
+
+# Row 2 is rejected, so the first flush (after 4 imported parts) happens
+# partway through the second chunk, before the repeat of DMT-01010100001
+_REPEAT_AFTER_FLUSH = _csv(
+    "BAD-ID,x",
+    "DMT-01010100001,M1",
+    "DMT-01010100002,M2",
+    "DMT-01010100003,M3",
+    "DMT-01010100004,M4",
+    "DMT-01010100005,M5",
+    "DMT-01010100001,again",
+)
+
+
+def test_repeat_after_mid_chunk_flush_is_a_row_error():
+    report = importer.run_import(_REPEAT_AFTER_FLUSH).to_dict()
+
+    assert report["imported"] == 5
+    assert [e["row"] for e in report["errors"]] == [2, 8]
+    assert report["errors"][1]["reason"].startswith("Duplicate DMTUID DMT-01010100001")
+
+
+def test_repeat_after_mid_chunk_flush_replaces():
+    report = importer.run_import(_REPEAT_AFTER_FLUSH, replace_existing=True).to_dict()
+
+    assert report["imported"] == 6
+    assert [e["row"] for e in report["errors"]] == [2]
+    session = get_session()
+    try:
+        assert session.get(Part, "DMT-01010100001").mpn == "again"
+    finally:
+        session.close()
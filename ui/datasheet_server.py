@@ -3,23 +3,48 @@ ui.datasheet_server - Serve local datasheet PDFs securely.
 
 Only files under config.DATASHEETS_DIR are served.
 Path-traversal (../) is blocked by resolving to absolute path
-and checking the prefix.
+and checking it is inside DATASHEETS_DIR.
+
+Behind nginx (config.DATASHEETS_ACCEL_PREFIX set) the file itself is
+sent by nginx via X-Accel-Redirect; Python only does the checks above.
 """
 
-from flask import send_from_directory, abort
+import mimetypes
+from urllib.parse import quote
+
+from flask import Response, send_from_directory, abort
 
 from ui import ui_bp
 import config
 
+# Browser cache lifetime for datasheets.  Files can be replaced on disk
+# under the same name, so they are not marked immutable; after expiry the
+# browser revalidates with the ETag / Last-Modified from send_from_directory
+# and gets a 304 if the file is unchanged.
+DATASHEET_MAX_AGE = 24 * 3600
+
 
 @ui_bp.route("/datasheets/<path:filename>")
 def serve_datasheet(filename: str):
     safe_path = (config.DATASHEETS_DIR / filename).resolve()
 
-    # Must stay inside DATASHEETS_DIR
-    if not str(safe_path).startswith(str(config.DATASHEETS_DIR)):
+    # Must stay inside DATASHEETS_DIR (already resolved in config).  A
+    # string prefix test would also accept siblings like "datasheets2/".
+    if not safe_path.is_relative_to(config.DATASHEETS_DIR):
         abort(403)
     if not safe_path.is_file():
         abort(404)
 
-    return send_from_directory(config.DATASHEETS_DIR, filename)
+    if config.DATASHEETS_ACCEL_PREFIX:
+        rel = safe_path.relative_to(config.DATASHEETS_DIR).as_posix()
+        mimetype = mimetypes.guess_type(rel)[0] or "application/octet-stream"
+        resp = Response(mimetype=mimetype)
+        resp.headers["X-Accel-Redirect"] = f"{config.DATASHEETS_ACCEL_PREFIX}/{quote(rel)}"
+        resp.cache_control.public = True
+        resp.cache_control.max_age = DATASHEET_MAX_AGE
+        return resp
+
+    return send_from_directory(
+        config.DATASHEETS_DIR, filename,
+        conditional=True, max_age=DATASHEET_MAX_AGE,
+    )
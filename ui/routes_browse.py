@@ -2,13 +2,12 @@
 ui.routes_browse - Main browse / search table page.
 """
 
-import json
-from flask import request, render_template
+from flask import request, render_template, abort
 
 from ui import ui_bp
 from db import get_session
 from db.models import PartPricing
-from services.search_service import SearchService
+from services.search_service import SearchService, parse_prop_filters
 from schema.loader import get_domains, domain_name, family_name
 import config
 
@@ -45,12 +44,9 @@ def index():
         sort_order = "asc"
 
     # Parse property filters from JSON
-    props_parsed = {}
-    if props:
-        try:
-            props_parsed = json.loads(props)
-        except json.JSONDecodeError:
-            props_parsed = {}
+    if len(props) > config.PROPS_MAX_LENGTH:
+        abort(400)
+    props_parsed = parse_prop_filters(props)
 
     session = get_session()
     try:
@@ -59,6 +55,7 @@ def index():
             sort_by=sort_by, sort_order=sort_order,
             limit=per_page,
             offset=(page - 1) * per_page,
+            eager_fields=False,   # the table only shows Part columns
         )
         total_pages = max((total + per_page - 1) // per_page, 1)
 
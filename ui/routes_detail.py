@@ -51,7 +51,7 @@ def part_detail(dmtuid: str):
             template=template,
             domain_name=domain_name,
             family_name=family_name,
-            parse_distributors=parse_distributors,
+            distributors=parse_distributors(part.distributor),
             pricing_data=pricing_data,
             images=images,
         )
@@ -4,14 +4,19 @@ ui.routes_forms - Add / Edit / Delete part forms.
 
 import re
 import json
+import logging
+from collections import ChainMap
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from flask import request, render_template, redirect, url_for, flash, abort
 
 import config
 from ui import ui_bp
 from db import get_session
-from db.models import PartField
+from db.models import Part, PartField
 from services.parts_service import PartsService
+from services.search_service import invalidate_facets
 from services.kicad_symbol_processor import KiCadSymbolProcessor
 from services import kicad_staging
 from schema.loader import get_domains, domain_name, family_name
@@ -20,6 +25,8 @@ from schema.numbering import build_dmtuid
 from services.sequence_service import next_xxx
 from import_engine.field_map import DIRECT_FIELDS, SKIP_FOR_EAV
 
+logger = logging.getLogger(__name__)
+
 
 def parse_distributors(distributor_field: str) -> list:
     """
@@ -46,6 +53,12 @@ PASSIVE_LIBRARY_MAP = {
     ("01", "03"): "DMTDB_PassiveComponents_Inductors",   # Inductors
 }
 
+# (library name, library file) per passive family, resolved once
+_PASSIVE_LIB_PATHS = {
+    key: (lib_name, config.KICAD_SYMBOLS_DIR / f"{lib_name}.kicad_sym")
+    for key, lib_name in PASSIVE_LIBRARY_MAP.items()
+}
+
 # Mapping package sizes to KiCad footprint names
 PACKAGE_TO_FOOTPRINT = {
     # Metric (imperial) - supported sizes
@@ -59,6 +72,9 @@ PACKAGE_TO_FOOTPRINT = {
     "2512": ("R_2512_6332Metric", "C_2512_6332Metric"),
 }
 
+# Package size token in a 'Package / Case' value, e.g. "0402 (1005 Metric)"
+_PACKAGE_SIZE_RE = re.compile(r'\b(0201|0402|0603|0805|1206|1210|2010|2512)\b')
+
 
 def derive_footprint_from_package(package_case: str, family: str) -> tuple[str | None, str | None]:
     """
@@ -74,16 +90,17 @@ def derive_footprint_from_package(package_case: str, family: str) -> tuple[str |
     if not package_case:
         return None, None
     
-    # Extract package size (4-digit number like 0402, 0805, 2512)
-    match = re.search(r'\b(0201|0402|0603|0805|1206|1210|2010|2512)\b', package_case)
-    if not match:
-        return None, None
-    
-    size = match.group(1)
-    if size not in PACKAGE_TO_FOOTPRINT:
-        return None, None
+    # Extract package size (4-digit number like 0402, 0805, 2512).  Values
+    # usually start with the size ("0402 (1005 Metric)"), which a dict probe
+    # of the first word finds; anything else goes through the regex.
+    footprints = PACKAGE_TO_FOOTPRINT.get(package_case.split(" ", 1)[0])
+    if footprints is None:
+        match = _PACKAGE_SIZE_RE.search(package_case)
+        if not match:
+            return None, None
+        footprints = PACKAGE_TO_FOOTPRINT[match.group(1)]
     
-    r_fp, c_fp = PACKAGE_TO_FOOTPRINT[size]
+    r_fp, c_fp = footprints
     
     # Choose footprint and 3D model based on family
     if family == "01":  # Capacitors
@@ -96,6 +113,90 @@ def derive_footprint_from_package(package_case: str, family: str) -> tuple[str |
     return None, None
 
 
+# Defaults for form keys the browser may omit; the request form is layered
+# over this instead of being copied (unchecked checkbox sends nothing)
+_FORM_DEFAULTS = {"eol": "off"}
+
+
+def _finalize_part(part: Part, data: Mapping, staging_session_id: str | None) -> None:
+    """
+    Post-save KiCad bookkeeping shared by add and edit (before commit):
+    move staged KiCad files into the libraries and derive footprint/3D
+    model from "Package / Case" when none is set.
+    """
+    # Process staged KiCad files if any; sessions without uploads are left
+    # to the staging cleanup
+    if staging_session_id and kicad_staging.has_staged_files(staging_session_id):
+        staged_result = kicad_staging.process_staged_files(
+            staging_session_id, 
+            dmtuid=part.dmtuid,
+            tt=part.tt,
+            ff=part.ff,
+            value=part.value,
+            mpn=part.mpn,
+            kicad_footprint=part.kicad_footprint
+        )
+        # Update part with KiCad field references from staged files
+        if staged_result.get('symbol_ref'):
+            part.kicad_symbol = staged_result['symbol_ref']
+        if staged_result.get('footprint_ref'):
+            part.kicad_footprint = staged_result['footprint_ref']
+        if staged_result.get('model3d_name'):
+            part.kicad_3dmodel = staged_result['model3d_name']
+
+    # Auto-populate kicad_footprint and kicad_3dmodel from "Package / Case" if not set
+    if not part.kicad_footprint:
+        package_case = data.get("Package / Case", "")
+        derived_fp, derived_3d = derive_footprint_from_package(package_case, part.ff)
+        if derived_fp:
+            part.kicad_footprint = derived_fp
+        if derived_3d and not part.kicad_3dmodel:
+            part.kicad_3dmodel = derived_3d
+
+
+# ── Passive symbol generation ──────────────────────────────────────────
+# Writing a symbol rewrites a shared .kicad_sym library, so it runs after
+# the part is committed instead of inside the form request.  Concurrent
+# writers (this worker, staging, library uploads) are serialized per file
+# by KiCadSymbolProcessor.add_symbol_to_library().
+
+_symbol_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kicad-symbols")
+
+
+def _queue_passive_symbol(dmtuid: str, tt: str, ff: str, update_existing: bool = False) -> None:
+    """Queue symbol generation for a committed part if it is a passive."""
+    lib = _PASSIVE_LIB_PATHS.get((tt, ff))
+    if lib:
+        _symbol_executor.submit(_generate_passive_symbol, dmtuid, *lib, update_existing)
+
+
+def _generate_passive_symbol(dmtuid: str, lib_name: str, lib_path: Path,
+                             update_existing: bool) -> None:
+    """
+    Background task: add/update the part's symbol in its passive library
+    and point kicad_symbol at it, using a short-lived session.
+    """
+    session = get_session()
+    try:
+        part = PartsService.get_with_fields(session, dmtuid)
+        if not part:
+            return
+
+        # Returns "added", "updated", "exists", or "error"
+        result = KiCadSymbolProcessor.generate_passive_symbol(
+            part, lib_path, update_existing=update_existing)
+        if result in ("added", "updated", "exists"):
+            # Build symbol reference: "LibName:Value MPN"
+            symbol_name = KiCadSymbolProcessor.passive_symbol_name(part.value or "", part.mpn or "")
+            part.kicad_symbol = f"{lib_name}:{symbol_name}"
+            session.commit()
+    except Exception:
+        session.rollback()
+        logger.exception("Error generating symbol for %s", dmtuid)
+    finally:
+        session.close()
+
+
 # ── Add ────────────────────────────────────────────────────────────────
 
 @ui_bp.route("/part/add", methods=["GET", "POST"])
@@ -110,7 +211,7 @@ def part_add():
         if template_dmtuid:
             session = get_session()
             try:
-                template_part = PartsService.get(session, template_dmtuid)
+                template_part = PartsService.get_with_fields(session, template_dmtuid)
             finally:
                 session.close()
         
@@ -120,67 +221,20 @@ def part_add():
             parse_distributors=parse_distributors,
         )
 
-    # POST: collect form data into a dict and delegate to PartsService
-    data = dict(request.form)
-    staging_session_id = data.pop('staging_session_id', None)
-    data.setdefault("eol", "off")  # unchecked checkbox sends nothing
+    # POST: delegate the form to PartsService, which only reads it
+    staging_session_id = request.form.get('staging_session_id')
+    data = ChainMap(request.form, _FORM_DEFAULTS)
     
     session = get_session()
     try:
         part = PartsService.create(session, data)
         
-        # Process staged KiCad files if any
-        if staging_session_id:
-            staged_result = kicad_staging.process_staged_files(
-                staging_session_id, 
-                dmtuid=part.dmtuid,
-                tt=part.tt,
-                ff=part.ff,
-                value=part.value,
-                mpn=part.mpn,
-                kicad_footprint=part.kicad_footprint
-            )
-            # Update part with KiCad field references from staged files
-            if staged_result.get('symbol_ref'):
-                part.kicad_symbol = staged_result['symbol_ref']
-            if staged_result.get('footprint_ref'):
-                part.kicad_footprint = staged_result['footprint_ref']
-            if staged_result.get('model3d_name'):
-                part.kicad_3dmodel = staged_result['model3d_name']
-        
-        # Auto-populate kicad_footprint and kicad_3dmodel from "Package / Case" if not set
-        if not part.kicad_footprint:
-            package_case = data.get("Package / Case", "")
-            derived_fp, derived_3d = derive_footprint_from_package(package_case, part.ff)
-            if derived_fp:
-                part.kicad_footprint = derived_fp
-            if derived_3d and not part.kicad_3dmodel:
-                part.kicad_3dmodel = derived_3d
-        
-        # Auto-generate symbol for passive components
-        lib_key = (part.tt, part.ff)
-        if lib_key in PASSIVE_LIBRARY_MAP:
-            lib_name = PASSIVE_LIBRARY_MAP[lib_key]
-            lib_path = config.KICAD_SYMBOLS_DIR / f"{lib_name}.kicad_sym"
-            
-            # Generate the symbol - returns "added", "exists", or "error"
-            result = KiCadSymbolProcessor.generate_passive_symbol(part, lib_path)
-            if result in ("added", "exists"):
-                # Build symbol reference: "LibName:Value MPN"
-                value = part.value or ""
-                mpn = part.mpn or ""
-                mpn_sanitized = re.sub(r'[<>:"/\\|?*]', '_', mpn)
-                if value and mpn_sanitized:
-                    symbol_name = f"{value} {mpn_sanitized}"
-                elif mpn_sanitized:
-                    symbol_name = mpn_sanitized
-                else:
-                    symbol_name = value
-                
-                # Set kicad_symbol on the part
-                part.kicad_symbol = f"{lib_name}:{symbol_name}"
-        
+        _finalize_part(part, data, staging_session_id)
+
         session.commit()
+        invalidate_facets()
+        # Auto-generate symbol for passive components
+        _queue_passive_symbol(part.dmtuid, part.tt, part.ff)
         flash(f"Part {part.dmtuid} created.", "success")
         return redirect(url_for("ui.part_detail", dmtuid=part.dmtuid))
     except Exception as exc:
@@ -197,7 +251,7 @@ def part_add():
 def part_edit(dmtuid: str):
     session = get_session()
     try:
-        part = PartsService.get(session, dmtuid)
+        part = PartsService.get_with_fields(session, dmtuid)
         if not part:
             abort(404)
         template = get_fields(part.tt, part.ff)
@@ -211,64 +265,17 @@ def part_edit(dmtuid: str):
             )
 
         # POST
-        data = dict(request.form)
-        staging_session_id = data.pop('staging_session_id', None)
-        data.setdefault("eol", "off")  # unchecked checkbox sends nothing
+        staging_session_id = request.form.get('staging_session_id')
+        data = ChainMap(request.form, _FORM_DEFAULTS)
         
         PartsService.update(session, part, data)
         
-        # Process staged KiCad files if any
-        if staging_session_id:
-            staged_result = kicad_staging.process_staged_files(
-                staging_session_id, 
-                dmtuid=part.dmtuid,
-                tt=part.tt,
-                ff=part.ff,
-                value=part.value,
-                mpn=part.mpn,
-                kicad_footprint=part.kicad_footprint
-            )
-            # Update part with KiCad field references from staged files
-            if staged_result.get('symbol_ref'):
-                part.kicad_symbol = staged_result['symbol_ref']
-            if staged_result.get('footprint_ref'):
-                part.kicad_footprint = staged_result['footprint_ref']
-            if staged_result.get('model3d_name'):
-                part.kicad_3dmodel = staged_result['model3d_name']
-        
-        # Auto-populate kicad_footprint and kicad_3dmodel from "Package / Case" if not set
-        if not part.kicad_footprint:
-            package_case = data.get("Package / Case", "")
-            derived_fp, derived_3d = derive_footprint_from_package(package_case, part.ff)
-            if derived_fp:
-                part.kicad_footprint = derived_fp
-            if derived_3d and not part.kicad_3dmodel:
-                part.kicad_3dmodel = derived_3d
-        
-        # Auto-generate/regenerate symbol for passive components
-        lib_key = (part.tt, part.ff)
-        if lib_key in PASSIVE_LIBRARY_MAP:
-            lib_name = PASSIVE_LIBRARY_MAP[lib_key]
-            lib_path = config.KICAD_SYMBOLS_DIR / f"{lib_name}.kicad_sym"
-            
-            # Generate/update symbol - returns "added", "updated", "exists", or "error"
-            result = KiCadSymbolProcessor.generate_passive_symbol(part, lib_path, update_existing=True)
-            if result in ("added", "updated", "exists"):
-                # Build symbol reference: "LibName:Value MPN"
-                value = part.value or ""
-                mpn = part.mpn or ""
-                mpn_sanitized = re.sub(r'[<>:"/\\|?*]', '_', mpn)
-                if value and mpn_sanitized:
-                    symbol_name = f"{value} {mpn_sanitized}"
-                elif mpn_sanitized:
-                    symbol_name = mpn_sanitized
-                else:
-                    symbol_name = value
-                
-                # Update kicad_symbol reference
-                part.kicad_symbol = f"{lib_name}:{symbol_name}"
-        
+        _finalize_part(part, data, staging_session_id)
+
         session.commit()
+        invalidate_facets()
+        # Auto-generate/regenerate symbol for passive components
+        _queue_passive_symbol(part.dmtuid, part.tt, part.ff, update_existing=True)
         flash(f"Part {dmtuid} updated.", "success")
         return redirect(url_for("ui.part_detail", dmtuid=dmtuid))
     except Exception as exc:
@@ -290,6 +297,7 @@ def part_delete(dmtuid: str):
             abort(404)
         PartsService.delete(session, part)
         session.commit()
+        invalidate_facets()
         flash(f"Part {dmtuid} deleted.", "success")
         return redirect(url_for("ui.index"))
     except Exception as exc:
@@ -5,6 +5,7 @@ ui.routes_import - CSV import upload page.
 from flask import request, render_template, flash
 
 from ui import ui_bp
+from services.search_service import invalidate_facets
 from import_engine import run_import
 
 
@@ -19,6 +20,8 @@ def import_page():
         return render_template("import.html", report=None)
 
     replace = request.form.get("replace") == "1"
-    content = f.read()
-    report = run_import(content, replace_existing=replace)
+    # Parsed straight from the upload stream (Werkzeug spools large files
+    # to disk) instead of reading the whole CSV into memory first
+    report = run_import(f.stream, replace_existing=replace)
+    invalidate_facets()
     return render_template("import.html", report=report.to_dict())
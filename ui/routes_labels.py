@@ -4,11 +4,24 @@ ui.routes_labels - Label printing functionality.
 Generate SVG labels for ESD bags and reels with DMTUID barcodes.
 """
 
-from flask import render_template, request, Response, jsonify
-
+import hashlib
+import io
+import json
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import NamedTuple
+
+from flask import render_template, request, Response, jsonify, send_file
+from jinja2 import Environment, FileSystemLoader
+from markupsafe import Markup, escape
+
+import config
 from ui import ui_bp
 from db import get_session
 from db.models import Part
+from services.parts_service import PartsService
 from services.barcode_service import generate_barcode_svg_centered
 from schema.loader import get_domains
 
@@ -29,177 +42,222 @@ def _truncate(text: str, max_len: int) -> str:
     return text[:max_len-1] + "…" if len(text) > max_len else text
 
 
+@lru_cache(maxsize=256)
+def _package_from_extra(extra_json: str) -> str:
+    """
+    Package value from a raw extra_json string.
+
+    Keyed on the JSON text itself, so preview/download/print of the same
+    part decode it once and an edited part never sees a stale value.
+    """
+    try:
+        extra = json.loads(extra_json)
+        return extra.get("Package / Case", "") or extra.get("Package", "")
+    except (ValueError, AttributeError):
+        return ""
+
+
 def _get_package(part: Part) -> str:
     """Get package value from EAV fields or extra_json."""
-    import json
-    # First check EAV fields
+    # First check EAV fields: one pass picking out the two package keys
+    # (last row wins) instead of mapping every field
+    package_case = package = None
     for f in part.fields:
-        if f.field_name in ("Package / Case", "Package"):
-            return f.field_value or ""
+        name = f.field_name
+        if name == "Package / Case":
+            package_case = f.field_value
+        elif name == "Package":
+            package = f.field_value
+    for value in (package_case, package):
+        if value is not None:
+            return value or ""
     # Fallback to extra_json
     if part.extra_json:
-        try:
-            extra = json.loads(part.extra_json)
-            return extra.get("Package / Case", "") or extra.get("Package", "")
-        except:
-            pass
+        return _package_from_extra(part.extra_json)
     return ""
 
 
-def _generate_label_50x30(part: Part, for_print: bool = False) -> str:
-    """
-    Generate 50x30mm label SVG.
-    Compact label for small ESD bags.
-    """
-    # Scale: viewBox 500x300 = 50x30mm (10 units per mm)
-    barcode = generate_barcode_svg_centered(part.dmtuid, 250, 190, width=450, height=75)
-    
-    mpn = _truncate(part.mpn or "", 25)
-    mfr = _truncate(part.manufacturer or "", 25)
-    desc = _truncate(part.description or "", 35)
-    value = part.value or ""
-    package = _get_package(part)
-    
-    frame = '' if for_print else '<rect x="5" y="5" width="490" height="290" fill="none" stroke="#ccc" stroke-width="1" stroke-dasharray="5,5"/>'
-    
-    svg = f'''<?xml version="1.0" encoding="UTF-8"?>
-<svg width="50mm" height="30mm" viewBox="0 0 500 300" xmlns="http://www.w3.org/2000/svg">
-  {frame}
-  <text x="15" y="35" font-size="24" font-family="Arial, sans-serif"><tspan font-weight="bold">DMTUID:</tspan> {part.dmtuid}</text>
-  <line x1="15" y1="49" x2="485" y2="49" stroke="#999" stroke-width="1"/>
-  
-  <text x="15" y="77" font-size="20" font-family="Arial, sans-serif"><tspan font-weight="bold">MPN:</tspan> {mpn}</text>
-  <text x="15" y="105" font-size="20" font-family="Arial, sans-serif"><tspan font-weight="bold">MFR:</tspan> {mfr}</text>
-  <text x="80" y="130" font-size="20" font-family="Arial, sans-serif"><tspan font-weight="bold">Value:</tspan> {value}</text>
-  <text x="80" y="155" font-size="20" font-family="Arial, sans-serif"><tspan font-weight="bold">Package:</tspan> {package}</text>
-  <line x1="15" y1="165" x2="485" y2="165" stroke="#999" stroke-width="1"/>  
-  <text x="15" y="185" font-size="17" font-family="Arial, sans-serif"><tspan font-weight="bold">Desc:</tspan> {desc}</text>
-  
-  {barcode}
-  <text x="250" y="285" font-size="20" font-family="monospace" text-anchor="middle" fill="#333">{part.dmtuid}</text>
-</svg>'''
-    return svg
-
-
-def _generate_label_75x50(part: Part, for_print: bool = False) -> str:
-    """
-    Generate 75x50mm label SVG.
-    Medium label with more room for details.
-    """
-    # Scale: viewBox 750x500 = 75x50mm (10 units per mm)
-    barcode = generate_barcode_svg_centered(part.dmtuid, 375, 350, width=620, height=85)
-    
-    mpn = _truncate(part.mpn or "", 35)
-    mfr = _truncate(part.manufacturer or "", 35)
-    desc = _truncate(part.description or "", 50)
-    value = part.value or ""
-    package = _get_package(part)
-    
-    frame = '' if for_print else '<rect x="5" y="5" width="740" height="490" fill="none" stroke="#ccc" stroke-width="1" stroke-dasharray="5,5"/>'
-    
-    svg = f'''<?xml version="1.0" encoding="UTF-8"?>
-<svg width="75mm" height="50mm" viewBox="0 0 750 500" xmlns="http://www.w3.org/2000/svg">
-  {frame}
-  <text x="25" y="58" font-size="36" font-family="Arial, sans-serif"><tspan font-weight="bold">DMTUID:</tspan> {part.dmtuid}</text>
-  <line x1="25" y1="82" x2="725" y2="82" stroke="#999" stroke-width="1"/>
-  
-  <text x="25" y="128" font-size="30" font-family="Arial, sans-serif"><tspan font-weight="bold">MPN:</tspan> {mpn}</text>
-  <text x="25" y="175" font-size="30" font-family="Arial, sans-serif"><tspan font-weight="bold">MFR:</tspan> {mfr}</text>
-  <text x="100" y="220" font-size="30" font-family="Arial, sans-serif"><tspan font-weight="bold">Value:</tspan> {value}</text>
-  <text x="100" y="255" font-size="30" font-family="Arial, sans-serif"><tspan font-weight="bold">Package:</tspan> {package}</text>
-  <line x1="25" y1="270" x2="725" y2="270" stroke="#999" stroke-width="1"/>
-  <text x="25" y="300" font-size="25" font-family="Arial, sans-serif"><tspan font-weight="bold">Desc:</tspan> {desc}</text>
-  
-  {barcode}
-  <text x="375" y="475" font-size="22" font-family="monospace" text-anchor="middle" fill="#333">{part.dmtuid}</text>
-</svg>'''
-    return svg
-
-
-def _generate_label_100x50(part: Part, for_print: bool = False) -> str:
-    """
-    Generate 100x50mm label SVG.
-    Large label with full details.
-    """
-    # Scale: viewBox 1000x500 = 100x50mm (10 units per mm)
-    barcode = generate_barcode_svg_centered(part.dmtuid, 500, 350, width=800, height=85)
-    
-    mpn = _truncate(part.mpn or "", 45)
-    mfr = _truncate(part.manufacturer or "", 45)
-    desc = _truncate(part.description or "", 70)
-    value = part.value or ""
-    package = _get_package(part)
-    
-    frame = '' if for_print else '<rect x="5" y="5" width="990" height="490" fill="none" stroke="#ccc" stroke-width="1" stroke-dasharray="5,5"/>'
-    
-    svg = f'''<?xml version="1.0" encoding="UTF-8"?>
-<svg width="100mm" height="50mm" viewBox="0 0 1000 500" xmlns="http://www.w3.org/2000/svg">
-  {frame}
-  <text x="30" y="58" font-size="36" font-family="Arial, sans-serif"><tspan font-weight="bold">DMTUID:</tspan> {part.dmtuid}</text>
-  <line x1="30" y1="82" x2="970" y2="82" stroke="#999" stroke-width="1"/>
-  
-  <text x="30" y="128" font-size="30" font-family="Arial, sans-serif"><tspan font-weight="bold">MPN:</tspan> {mpn}</text>
-  <text x="30" y="175" font-size="30" font-family="Arial, sans-serif"><tspan font-weight="bold">MFR:</tspan> {mfr}</text>
-  <text x="100" y="238" font-size="35" font-family="Arial, sans-serif"><tspan font-weight="bold">Value:</tspan> {value}</text>
-  <text x="520" y="238" font-size="35" font-family="Arial, sans-serif"><tspan font-weight="bold">Package:</tspan> {package}</text>
-  <line x1="30" y1="258" x2="970" y2="258" stroke="#999" stroke-width="1"/>
-  <text x="30" y="300" font-size="25" font-family="Arial, sans-serif"><tspan font-weight="bold">Desc:</tspan> {desc}</text>
-  
-  {barcode}
-  <text x="500" y="475" font-size="22" font-family="monospace" text-anchor="middle" fill="#333">{part.dmtuid}</text>
-</svg>'''
-    return svg
-
-
-def _generate_label_4x6(part: Part, for_print: bool = False) -> str:
+# ── Label layouts ───────────────────────────────────────────────────────
+# All sizes share one SVG skeleton; a layout only positions the elements.
+# Coordinates are viewBox units (10 units per mm).
+
+class _Text(NamedTuple):
+    """Bold label followed by a part field (either may be omitted)."""
+    x: int
+    y: int
+    size: int
+    label: str = ""
+    field: str | None = None
+    fill: str | None = None
+    kind = "text"
+
+
+class _Caption(NamedTuple):
+    """Plain static text."""
+    x: int
+    y: int
+    size: int
+    text: str
+    fill: str
+    kind = "caption"
+
+
+class _Rule(NamedTuple):
+    """Horizontal separator line."""
+    x1: int
+    y: int
+    x2: int
+    kind = "rule"
+
+
+class _Box(NamedTuple):
+    """Shaded area (e.g. for handwritten notes)."""
+    x: int
+    y: int
+    width: int
+    height: int
+    kind = "box"
+
+
+LABEL_LAYOUTS = {
+    "50x30": {
+        "width_mm": 50, "height_mm": 30, "view_w": 500, "view_h": 300,
+        "frame": (5, 1, "5,5"),            # inset, stroke width, dash array
+        "stroke": 1,
+        "truncate": {"mpn": 25, "mfr": 25, "desc": 35},
+        "elements": (
+            _Text(15, 35, 24, "DMTUID:", "dmtuid"),
+            _Rule(15, 49, 485),
+            _Text(15, 77, 20, "MPN:", "mpn"),
+            _Text(15, 105, 20, "MFR:", "mfr"),
+            _Text(80, 130, 20, "Value:", "value"),
+            _Text(80, 155, 20, "Package:", "package"),
+            _Rule(15, 165, 485),
+            _Text(15, 185, 17, "Desc:", "desc"),
+        ),
+        "barcode": (250, 190, 450, 75),    # center x, top y, width, height
+        "footer": (250, 285, 20),          # center x, baseline y, font size
+    },
+    "75x50": {
+        "width_mm": 75, "height_mm": 50, "view_w": 750, "view_h": 500,
+        "frame": (5, 1, "5,5"),
+        "stroke": 1,
+        "truncate": {"mpn": 35, "mfr": 35, "desc": 50},
+        "elements": (
+            _Text(25, 58, 36, "DMTUID:", "dmtuid"),
+            _Rule(25, 82, 725),
+            _Text(25, 128, 30, "MPN:", "mpn"),
+            _Text(25, 175, 30, "MFR:", "mfr"),
+            _Text(100, 220, 30, "Value:", "value"),
+            _Text(100, 255, 30, "Package:", "package"),
+            _Rule(25, 270, 725),
+            _Text(25, 300, 25, "Desc:", "desc"),
+        ),
+        "barcode": (375, 350, 620, 85),
+        "footer": (375, 475, 22),
+    },
+    "100x50": {
+        "width_mm": 100, "height_mm": 50, "view_w": 1000, "view_h": 500,
+        "frame": (5, 1, "5,5"),
+        "stroke": 1,
+        "truncate": {"mpn": 45, "mfr": 45, "desc": 70},
+        "elements": (
+            _Text(30, 58, 36, "DMTUID:", "dmtuid"),
+            _Rule(30, 82, 970),
+            _Text(30, 128, 30, "MPN:", "mpn"),
+            _Text(30, 175, 30, "MFR:", "mfr"),
+            _Text(100, 238, 35, "Value:", "value"),
+            _Text(520, 238, 35, "Package:", "package"),
+            _Rule(30, 258, 970),
+            _Text(30, 300, 25, "Desc:", "desc"),
+        ),
+        "barcode": (500, 350, 800, 85),
+        "footer": (500, 475, 22),
+    },
+    # 4" x 6" shipping label: no truncation, description wrapped over two lines
+    "4x6": {
+        "width_mm": 101.6, "height_mm": 152.4, "view_w": 1016, "view_h": 1524,
+        "frame": (10, 2, "10,10"),
+        "stroke": 2,
+        "truncate": {},
+        "desc_wrap": 50,
+        "elements": (
+            _Text(40, 70, 56, "DMTUID:", "dmtuid"),
+            _Rule(40, 100, 976),
+            _Text(40, 170, 48, "MPN:", "mpn"),
+            _Text(40, 250, 48, "MFR:", "mfr"),
+            _Text(40, 340, 48, "Value:", "value"),
+            _Text(40, 420, 48, "Package:", "package"),
+            _Text(40, 520, 40, "Description:"),
+            _Text(40, 580, 36, field="desc_1", fill="#333"),
+            _Text(40, 640, 36, field="desc_2", fill="#333"),
+            _Box(40, 720, 936, 400),
+            _Caption(55, 770, 32, "Notes:", "#999"),
+        ),
+        "barcode": (508, 1300, 850, 150),
+        "footer": (508, 1480, 36),
+    },
+}
+
+# Label SVG skeleton (templates/label.svg.j2), compiled once at import.
+# Autoescaped: text fields arrive as pre-escaped Markup from
+# _label_fields() and the barcode is wrapped in Markup.
+_SVG_ENV = Environment(
+    loader=FileSystemLoader(config.BASE_DIR / "templates"),
+    autoescape=True,
+    auto_reload=False,
+)
+_LABEL_SVG = _SVG_ENV.get_template("label.svg.j2")
+
+
+@lru_cache(maxsize=4096)
+def _label_fields(size: str, dmtuid: str, mpn: str, mfr: str, desc: str,
+                  value: str, package: str) -> dict[str, Markup]:
     """
-    Generate 4"x6" (101.6x152.4mm) shipping label SVG.
-    Large format with full details.
+    Truncated and XML-escaped text fields for one label size.
+
+    Keyed on the raw values, so re-rendering a part (size toggles, preview
+    then download/print) reuses the result and an edited part never hits
+    a stale entry.  The returned dict is shared; treat it as read-only.
     """
-    # Scale: viewBox 1016x1524 = 101.6x152.4mm (10 units per mm)
-    barcode = generate_barcode_svg_centered(part.dmtuid, 508, 1300, width=850, height=150)
-    
-    mpn = part.mpn or ""
-    mfr = part.manufacturer or ""
-    desc = part.description or ""
-    value = part.value or ""
-    package = _get_package(part)
-    
-    frame = '' if for_print else '<rect x="10" y="10" width="996" height="1504" fill="none" stroke="#ccc" stroke-width="2" stroke-dasharray="10,10"/>'
-    
-    svg = f'''<?xml version="1.0" encoding="UTF-8"?>
-<svg width="101.6mm" height="152.4mm" viewBox="0 0 1016 1524" xmlns="http://www.w3.org/2000/svg">
-  {frame}
-  <text x="40" y="70" font-size="56" font-family="Arial, sans-serif"><tspan font-weight="bold">DMTUID:</tspan> {part.dmtuid}</text>
-  <line x1="40" y1="100" x2="976" y2="100" stroke="#999" stroke-width="2"/>
-  
-  <text x="40" y="170" font-size="48" font-family="Arial, sans-serif"><tspan font-weight="bold">MPN:</tspan> {mpn}</text>
-  <text x="40" y="250" font-size="48" font-family="Arial, sans-serif"><tspan font-weight="bold">MFR:</tspan> {mfr}</text>
-  
-  <text x="40" y="340" font-size="48" font-family="Arial, sans-serif"><tspan font-weight="bold">Value:</tspan> {value}</text>
-  <text x="40" y="420" font-size="48" font-family="Arial, sans-serif"><tspan font-weight="bold">Package:</tspan> {package}</text>
-  
-  <text x="40" y="520" font-size="40" font-family="Arial, sans-serif"><tspan font-weight="bold">Description:</tspan></text>
-  <text x="40" y="580" font-size="36" font-family="Arial, sans-serif" fill="#333">{_truncate(desc, 50)}</text>
-  <text x="40" y="640" font-size="36" font-family="Arial, sans-serif" fill="#333">{_truncate(desc[50:] if len(desc) > 50 else "", 50)}</text>
-  
-  <rect x="40" y="720" width="936" height="400" fill="#fafafa" stroke="#ddd" stroke-width="1"/>
-  <text x="55" y="770" font-size="32" font-family="Arial, sans-serif" fill="#999">Notes:</text>
-  
-  {barcode}
-  <text x="508" y="1480" font-size="36" font-family="monospace" text-anchor="middle" fill="#333">{part.dmtuid}</text>
-</svg>'''
-    return svg
-
-
-# Label generator dispatch
+    layout = LABEL_LAYOUTS[size]
+    fields = {
+        "dmtuid": dmtuid, "mpn": mpn, "mfr": mfr,
+        "desc": desc, "value": value, "package": package,
+    }
+    for key, max_len in layout["truncate"].items():
+        fields[key] = _truncate(fields[key], max_len)
+    wrap = layout.get("desc_wrap")
+    if wrap:
+        fields["desc_1"] = _truncate(desc, wrap)
+        fields["desc_2"] = _truncate(desc[wrap:], wrap)
+    return {key: escape(text) for key, text in fields.items()}
+
+
+def _generate_label(part: Part, size: str, for_print: bool = False) -> str:
+    """Generate the label SVG for one LABEL_LAYOUTS entry."""
+    layout = LABEL_LAYOUTS[size]
+    fields = _label_fields(
+        size, part.dmtuid, part.mpn or "", part.manufacturer or "",
+        part.description or "", part.value or "", _get_package(part),
+    )
+
+    center_x, top, width, height = layout["barcode"]
+    barcode = generate_barcode_svg_centered(part.dmtuid, center_x, top, width=width, height=height)
+
+    return _LABEL_SVG.render(L=layout, fields=fields, barcode=Markup(barcode), frame=not for_print)
+
+
+# Label generator dispatch: generator(part, for_print=False) -> SVG
 LABEL_GENERATORS = {
-    "50x30": _generate_label_50x30,
-    "75x50": _generate_label_75x50,
-    "100x50": _generate_label_100x50,
-    "4x6": _generate_label_4x6,
+    size: partial(_generate_label, size=size)
+    for size in LABEL_LAYOUTS
 }
 
+# Size validation for the endpoints; the error text is built once
+_VALID_SIZES = frozenset(LABEL_GENERATORS)
+_INVALID_SIZE_ERROR = f"Invalid size. Valid: {list(LABEL_SIZES.keys())}"
+
 
 @ui_bp.route("/labels")
 def labels_page():
@@ -221,17 +279,23 @@ def label_preview():
     if not dmtuid:
         return jsonify({"error": "dmtuid required"}), 400
     
-    if size not in LABEL_GENERATORS:
-        return jsonify({"error": f"Invalid size. Valid: {list(LABEL_SIZES.keys())}"}), 400
+    if size not in _VALID_SIZES:
+        return jsonify({"error": _INVALID_SIZE_ERROR}), 400
     
     session = get_session()
     try:
-        part = session.query(Part).filter(Part.dmtuid == dmtuid).first()
+        part = PartsService.get_with_fields(session, dmtuid)
         if not part:
             return jsonify({"error": "Part not found"}), 404
         
-        svg = LABEL_GENERATORS[size](part, for_print=for_print)
-        return Response(svg, mimetype="image/svg+xml")
+        svg = LABEL_GENERATORS[size](part, for_print=for_print).encode("utf-8")
+        
+        # Content ETag like label_download(), so a re-requested preview of
+        # an unchanged label is answered with 304 Not Modified
+        resp = Response(svg, mimetype="image/svg+xml")
+        resp.set_etag(hashlib.blake2b(svg, digest_size=16).hexdigest())
+        resp.cache_control.no_cache = True
+        return resp.make_conditional(request)
     finally:
         session.close()
 
@@ -249,25 +313,30 @@ def label_download():
     if not dmtuid:
         return jsonify({"error": "dmtuid required"}), 400
     
-    if size not in LABEL_GENERATORS:
-        return jsonify({"error": f"Invalid size"}), 400
+    if size not in _VALID_SIZES:
+        return jsonify({"error": "Invalid size"}), 400
     
     session = get_session()
     try:
-        part = session.query(Part).filter(Part.dmtuid == dmtuid).first()
+        part = PartsService.get_with_fields(session, dmtuid)
         if not part:
             return jsonify({"error": "Part not found"}), 404
         
-        svg = LABEL_GENERATORS[size](part, for_print=True)
+        svg = LABEL_GENERATORS[size](part, for_print=True).encode("utf-8")
         
         # Sanitize filename
         safe_dmtuid = dmtuid.replace("-", "_")
         filename = f"label_{safe_dmtuid}_{size}.svg"
         
-        return Response(
-            svg,
+        # ETag from the SVG itself (EAV edits do not touch parts.updated_at);
+        # send_file marks it no-cache, so the browser revalidates and gets
+        # a 304 for an unchanged label
+        return send_file(
+            io.BytesIO(svg),
             mimetype="image/svg+xml",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+            as_attachment=True,
+            download_name=filename,
+            etag=hashlib.blake2b(svg, digest_size=16).hexdigest(),
         )
     finally:
         session.close()
@@ -282,23 +351,115 @@ _niimbot_connection = {
     "address": None,
     "transport": None,
     "printer": None,
+    "keepalive": None,
 }
 
+# Serializes connecting, printing and disconnecting across request threads
+# and the keep-alive; reentrant so helpers can be called under it
+_niimbot_lock = threading.RLock()
+
+# Heartbeat period for the connected printer; BLE links drop when idle
+NIIMBOT_KEEPALIVE_INTERVAL = 20.0
+
+
+def _open_niimbot_connection(address: str, transport, printer) -> None:
+    """Make printer the current connection and start its keep-alive."""
+    from services.niimbot_service import NiimbotKeepAlive
+
+    keepalive = NiimbotKeepAlive(printer, interval=NIIMBOT_KEEPALIVE_INTERVAL,
+                                 on_dead=partial(_drop_dead_printer, printer))
+    _niimbot_connection.update(address=address, transport=transport,
+                               printer=printer, keepalive=keepalive)
+    keepalive.start()
+
+
+def _close_niimbot_connection() -> None:
+    """Stop the keep-alive, disconnect and forget the current printer."""
+    if _niimbot_connection["keepalive"]:
+        _niimbot_connection["keepalive"].stop()
+    if _niimbot_connection["transport"]:
+        try:
+            _niimbot_connection["transport"].disconnect()
+        except:
+            pass
+    _niimbot_connection.update(address=None, transport=None, printer=None, keepalive=None)
+
+
+def _drop_dead_printer(printer) -> None:
+    """Keep-alive callback: forget printer if it is still the current one."""
+    with _niimbot_lock:
+        if _niimbot_connection["printer"] is printer:
+            _close_niimbot_connection()
+
+
+def _live_niimbot_printer():
+    """
+    The connected printer, or None.  A link that dropped since the last
+    heartbeat is detected here and closed, so callers reconnect instead
+    of failing mid-print.
+    """
+    transport = _niimbot_connection["transport"]
+    if transport and not transport.is_connected:
+        _close_niimbot_connection()
+    return _niimbot_connection["printer"]
+
+# B1 printhead: 203 DPI (8 dots/mm), 384 dots wide
+NIIMBOT_DPI = 203
+NIIMBOT_MAX_WIDTH = 384
+
+
+# Batch prints rasterize up to this many labels ahead of the printer on
+# a worker thread, overlapping rendering with the Bluetooth transfer
+NIIMBOT_RENDER_AHEAD = 2
+
+_render_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="label-render")
+
+
+def _niimbot_label_packets(part: Part, size: str):
+    """
+    Print-ready label for a part as (packets, width, height), for
+    NiimbotPrinter.print_packed().
+
+    Rendering and row packing are cached on the generated SVG
+    (render_label_packets), so reprinting a label skips straight to the
+    Bluetooth transfer, and any change to the printed fields yields a new
+    SVG and thus a fresh render without explicit invalidation.
+    """
+    from services.niimbot_service import render_label_packets
+
+    svg = LABEL_GENERATORS[size](part, for_print=True)
+    return render_label_packets(svg, NIIMBOT_DPI, NIIMBOT_MAX_WIDTH)
+
+
+def _submit_label_render(part: Part, size: str):
+    """
+    Like _niimbot_label_packets(), but renders on the render worker and
+    returns a Future.  The SVG is generated on the calling thread so the
+    worker never touches the ORM session.
+    """
+    from services.niimbot_service import render_label_packets
+
+    svg = LABEL_GENERATORS[size](part, for_print=True)
+    return _render_executor.submit(render_label_packets, svg, NIIMBOT_DPI, NIIMBOT_MAX_WIDTH)
+
 
 @ui_bp.route("/labels/niimbot/scan")
 def niimbot_scan():
     """
-    GET /labels/niimbot/scan?filter=B1&timeout=10
+    GET /labels/niimbot/scan?filter=B1&timeout=10&all=0
     
-    Scan for Niimbot Bluetooth devices.
+    Scan for Niimbot Bluetooth devices. Returns as soon as a matching
+    device is found unless all=1, which scans for the full timeout.
     """
     from services.niimbot_service import NiimbotScanner
     
     name_filter = request.args.get("filter", "B1")
     timeout = float(request.args.get("timeout", "10"))
+    scan_all = request.args.get("all", "0") == "1"
     
     try:
-        devices = NiimbotScanner.scan(name_filter=name_filter, timeout=timeout)
+        devices = NiimbotScanner.scan(name_filter=name_filter, timeout=timeout,
+                                      stop_on_first=not scan_all)
         return jsonify({"devices": devices})
     except Exception as e:
         return jsonify({"error": str(e), "devices": []}), 500
@@ -321,30 +482,21 @@ def niimbot_connect():
     if not address:
         return jsonify({"error": "address required"}), 400
     
-    # Disconnect existing connection if any
-    if _niimbot_connection["transport"]:
-        try:
-            _niimbot_connection["transport"].disconnect()
-        except:
-            pass
-        _niimbot_connection["transport"] = None
-        _niimbot_connection["printer"] = None
-        _niimbot_connection["address"] = None
-    
-    try:
-        transport = NiimbotTransport(address)
-        if not transport.connect():
-            return jsonify({"error": "Failed to connect to printer"}), 500
-        
-        printer = NiimbotPrinter(transport, model)
-        
-        _niimbot_connection["address"] = address
-        _niimbot_connection["transport"] = transport
-        _niimbot_connection["printer"] = printer
+    with _niimbot_lock:
+        # Disconnect existing connection if any
+        _close_niimbot_connection()
         
-        return jsonify({"success": True, "address": address, "model": model})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        try:
+            transport = NiimbotTransport(address)
+            if not transport.connect():
+                return jsonify({"error": "Failed to connect to printer"}), 500
+            
+            printer = NiimbotPrinter(transport, model)
+            _open_niimbot_connection(address, transport, printer)
+            
+            return jsonify({"success": True, "address": address, "model": model})
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
 
 
 @ui_bp.route("/labels/niimbot/disconnect", methods=["POST"])
@@ -354,15 +506,8 @@ def niimbot_disconnect():
     
     Disconnect from current Niimbot printer.
     """
-    if _niimbot_connection["transport"]:
-        try:
-            _niimbot_connection["transport"].disconnect()
-        except:
-            pass
-    
-    _niimbot_connection["transport"] = None
-    _niimbot_connection["printer"] = None
-    _niimbot_connection["address"] = None
+    with _niimbot_lock:
+        _close_niimbot_connection()
     
     return jsonify({"success": True})
 
@@ -374,10 +519,13 @@ def niimbot_status():
     
     Get current Niimbot connection status.
     """
-    connected = _niimbot_connection["transport"] is not None
+    # Snapshot without taking _niimbot_lock, which a batch print holds for
+    # its whole run; the dict is only ever replaced wholesale via update()
+    conn = dict(_niimbot_connection)
+    connected = conn["transport"] is not None
     return jsonify({
         "connected": connected,
-        "address": _niimbot_connection["address"] if connected else None
+        "address": conn["address"] if connected else None
     })
 
 
@@ -391,7 +539,7 @@ def niimbot_print():
     If address is provided and different from current, reconnect.
     If no address and not connected, return error.
     """
-    from services.niimbot_service import NiimbotTransport, NiimbotPrinter, svg_to_image
+    from services.niimbot_service import NiimbotTransport, NiimbotPrinter
     
     data = request.get_json() or {}
     dmtuid = (data.get("dmtuid") or "").strip().upper()
@@ -403,70 +551,46 @@ def niimbot_print():
     if not dmtuid:
         return jsonify({"error": "dmtuid required"}), 400
     
-    if size not in LABEL_GENERATORS:
-        return jsonify({"error": f"Invalid size. Valid: {list(LABEL_SIZES.keys())}"}), 400
-    
-    # Handle connection
-    printer = _niimbot_connection["printer"]
+    if size not in _VALID_SIZES:
+        return jsonify({"error": _INVALID_SIZE_ERROR}), 400
     
-    if address and address != _niimbot_connection["address"]:
-        # Need to connect/reconnect
-        if _niimbot_connection["transport"]:
-            try:
-                _niimbot_connection["transport"].disconnect()
-            except:
-                pass
+    with _niimbot_lock:
+        # Handle connection
+        printer = _live_niimbot_printer()
         
-        transport = NiimbotTransport(address)
-        if not transport.connect():
-            return jsonify({"error": "Failed to connect to printer"}), 500
+        if address and address != _niimbot_connection["address"]:
+            # Need to connect/reconnect
+            _close_niimbot_connection()
+            
+            transport = NiimbotTransport(address)
+            if not transport.connect():
+                return jsonify({"error": "Failed to connect to printer"}), 500
+            
+            printer = NiimbotPrinter(transport, model)
+            _open_niimbot_connection(address, transport, printer)
         
-        printer = NiimbotPrinter(transport, model)
-        _niimbot_connection["address"] = address
-        _niimbot_connection["transport"] = transport
-        _niimbot_connection["printer"] = printer
-    
-    if not printer:
-        return jsonify({"error": "Not connected to printer. Provide address or connect first."}), 400
-    
-    # Get part and generate SVG
-    session = get_session()
-    try:
-        part = session.query(Part).filter(Part.dmtuid == dmtuid).first()
-        if not part:
-            return jsonify({"error": "Part not found"}), 404
-        
-        svg = LABEL_GENERATORS[size](part, for_print=True)
-        
-        # Convert SVG to image and print
-        # DPI: B1 is 203 DPI (8 dots/mm)
-        # 50x30mm = 400x240px, 75x50mm = 600x400px, 100x50mm = 800x400px
-        dpi_map = {
-            "50x30": 203,
-            "75x50": 203,
-            "100x50": 203,
-            "4x6": 203,
-        }
-        dpi = dpi_map.get(size, 203)
-        
-        image = svg_to_image(svg, dpi=dpi)
-        
-        # Ensure image fits printhead (384px for B1)
-        max_width = 384
-        if image.width > max_width:
-            ratio = max_width / image.width
-            new_height = int(image.height * ratio)
-            from PIL import Image as PILImage
-            image = image.resize((max_width, new_height), PILImage.Resampling.LANCZOS)
-        
-        printer.print_image(image, density=density)
-        
-        return jsonify({"success": True, "dmtuid": dmtuid, "size": size})
+        if not printer:
+            return jsonify({"error": "Not connected to printer. Provide address or connect first."}), 400
         
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-    finally:
-        session.close()
+        # Get part and generate SVG
+        session = get_session()
+        try:
+            part = PartsService.get_with_fields(session, dmtuid)
+            if not part:
+                return jsonify({"error": "Part not found"}), 404
+            
+            # Render at 203 DPI and fit to the printhead
+            # 50x30mm = 400x240px, 75x50mm = 600x400px, 100x50mm = 800x400px
+            packets, width, height = _niimbot_label_packets(part, size)
+            
+            printer.print_packed(packets, width, height, density=density)
+            
+            return jsonify({"success": True, "dmtuid": dmtuid, "size": size})
+            
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+        finally:
+            session.close()
 
 
 @ui_bp.route("/labels/niimbot/batch", methods=["POST"])
@@ -478,9 +602,6 @@ def niimbot_batch_print():
     Batch print multiple labels to Niimbot printer.
     Requires existing connection.
     """
-    from services.niimbot_service import svg_to_image
-    import time
-    
     data = request.get_json() or {}
     dmtuids = data.get("dmtuids", [])
     size = data.get("size", "50x30")
@@ -489,53 +610,74 @@ def niimbot_batch_print():
     if not dmtuids:
         return jsonify({"error": "dmtuids required"}), 400
     
-    if size not in LABEL_GENERATORS:
-        return jsonify({"error": f"Invalid size"}), 400
-    
-    printer = _niimbot_connection["printer"]
-    if not printer:
-        return jsonify({"error": "Not connected to printer"}), 400
-    
-    session = get_session()
-    results = {"success": [], "failed": []}
+    if size not in _VALID_SIZES:
+        return jsonify({"error": "Invalid size"}), 400
     
-    try:
-        for dmtuid in dmtuids:
-            dmtuid = dmtuid.strip().upper()
+    with _niimbot_lock:
+        printer = _live_niimbot_printer()
+        if not printer:
+            return jsonify({"error": "Not connected to printer"}), 400
+        
+        session = get_session()
+        results = {"success": [], "failed": []}
+        
+        def print_rendered(dmtuid, future) -> bool:
+            """Print one label; False if the printer did not become idle again."""
             try:
-                part = session.query(Part).filter(Part.dmtuid == dmtuid).first()
-                if not part:
-                    results["failed"].append({"dmtuid": dmtuid, "error": "Not found"})
-                    continue
-                
-                svg = LABEL_GENERATORS[size](part, for_print=True)
-                image = svg_to_image(svg, dpi=203)
-                
-                # Resize if needed
-                max_width = 384
-                if image.width > max_width:
-                    ratio = max_width / image.width
-                    new_height = int(image.height * ratio)
-                    from PIL import Image as PILImage
-                    image = image.resize((max_width, new_height), PILImage.Resampling.LANCZOS)
-                
-                printer.print_image(image, density=density)
+                packets, width, height = future.result()
+                printer.print_packed(packets, width, height, density=density)
                 results["success"].append(dmtuid)
-                
-                # Small delay between prints to let printer catch up
-                time.sleep(0.5)
-                
             except Exception as e:
                 results["failed"].append({"dmtuid": dmtuid, "error": str(e)})
+                return True
+            
+            # Let the printer finish feeding before the next label
+            return printer.wait_until_ready()
         
-        return jsonify({
-            "success": True,
-            "printed": len(results["success"]),
-            "failed": len(results["failed"]),
-            "details": results
-        })
-        
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-    finally:
-        session.close()
+        try:
+            # All parts and their EAV fields in two queries instead of two per label
+            dmtuids = [dmtuid.strip().upper() for dmtuid in dmtuids]
+            parts = PartsService.get_many_with_fields(session, dmtuids)
+            
+            # (dmtuid, render future) for labels queued ahead of the printer
+            rendering = deque()
+            ready = True
+            for index, dmtuid in enumerate(dmtuids):
+                try:
+                    part = parts.get(dmtuid)
+                    if not part:
+                        results["failed"].append({"dmtuid": dmtuid, "error": "Not found"})
+                        continue
+                    
+                    rendering.append((dmtuid, _submit_label_render(part, size)))
+                    
+                except Exception as e:
+                    results["failed"].append({"dmtuid": dmtuid, "error": str(e)})
+                
+                if len(rendering) > NIIMBOT_RENDER_AHEAD:
+                    ready = print_rendered(*rendering.popleft())
+                    if not ready:
+                        break
+            
+            while ready and rendering:
+                ready = print_rendered(*rendering.popleft())
+            
+            if not ready:
+                # Stop instead of sending labels to a printer that is still busy
+                for dmtuid, future in rendering:
+                    future.cancel()
+                    results["failed"].append({"dmtuid": dmtuid, "error": "Printer not ready"})
+                for dmtuid in dmtuids[index + 1:]:
+                    results["failed"].append({"dmtuid": dmtuid, "error": "Printer not ready"})
+            
+            return jsonify({
+                "success": ready,
+                "printed": len(results["success"]),
+                "failed": len(results["failed"]),
+                "details": results
+            })
+            
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+        finally:
+            session.close()